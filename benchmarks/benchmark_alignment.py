@@ -0,0 +1,84 @@
+"""
+Benchmarks the nearest-timestamp alignment used by morph_sequence
+
+Times the binary-search list version and the searchsorted array version
+on sorted relative timestamps from 10^3 up to 10^6 points.  The original
+copy-and-halve search is included for reference at the smaller sizes
+(it scales as O(n * m) and becomes impractical beyond that).
+
+Run from the root of the repository:
+python benchmarks/benchmark_alignment.py
+"""
+
+import random
+import timeit
+
+import numpy as np
+
+from promo.morph_utils import morph_sequence
+
+SIZE_LIST = [10**3, 10**4, 10**5, 10**6]
+MAX_LEGACY_SIZE = 10**4
+
+
+def _legacyGetSmallestDifference(inputList, targetVal):
+    targetList = inputList[:]
+    while True:
+        if len(targetList) == 1:
+            return targetList[0]
+        halfPoint = int(len(targetList) / 2.0) - 1
+        leftDiff = abs(targetVal - targetList[halfPoint])
+        rightDiff = abs(targetVal - targetList[halfPoint + 1])
+        if leftDiff == 0 or rightDiff == 0:
+            return targetVal
+        if leftDiff < rightDiff:
+            targetList = targetList[: halfPoint + 1]
+        else:
+            targetList = targetList[halfPoint + 1 :]
+
+
+def _legacyGetNearestMappingIndexList(fromValList, toValList):
+    return [
+        toValList.index(_legacyGetSmallestDifference(toValList, fromVal))
+        for fromVal in fromValList
+    ]
+
+
+def _makeTimestamps(n):
+    # Roughly what a 1 ms pitch track looks like on a relative time scale
+    timeList = sorted(random.random() for _ in range(n - 2))
+    return [0.0] + timeList + [1.0]
+
+
+def _bestOf(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    random.seed(0)
+
+    print("%10s %14s %14s %14s" % ("points", "legacy (s)", "bisect (s)", "numpy (s)"))
+    for n in SIZE_LIST:
+        fromList = _makeTimestamps(n)
+        toList = _makeTimestamps(int(n * 1.1))
+        fromArray = np.array(fromList)
+        toArray = np.array(toList)
+
+        legacyTime = float("nan")
+        if n <= MAX_LEGACY_SIZE:
+            legacyTime = _bestOf(
+                lambda: _legacyGetNearestMappingIndexList(fromList, toList), 1
+            )
+
+        bisectTime = _bestOf(
+            lambda: morph_sequence._getNearestMappingIndexList(fromList, toList)
+        )
+        numpyTime = _bestOf(
+            lambda: morph_sequence._getNearestMappingIndexArray(fromArray, toArray)
+        )
+
+        print("%10d %14.4f %14.4f %14.4f" % (n, legacyTime, bisectTime, numpyTime))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares the per-step latency of the duration resynthesis backends
+
+Runs duration_morph.changeDuration() on examples/files/mary1.wav with the
+numpy PSOLA backend and, if a praat executable is given, with the praat
+backends as well.
+
+Run from the root of the repository:
+python benchmarks/benchmark_duration_backends.py [path/to/praat]
+"""
+
+import os
+from os.path import join
+import shutil
+import sys
+import tempfile
+import time
+
+from promo import duration_morph
+from promo.morph_utils import resynthesis
+from promo.morph_utils import utils
+
+NUM_STEPS = 10
+
+_root = join(os.path.dirname(os.path.abspath(__file__)), "..", "examples", "files")
+
+
+def _timeBackend(backend, fromWavFN, durationParameters, stepList):
+    startTime = time.time()
+    duration_morph.changeDuration(
+        fromWavFN,
+        durationParameters,
+        stepList,
+        "mary1_dur_morph",
+        outputMinPitch=50,
+        outputMaxPitch=350,
+        praatEXE=None,
+        backend=backend,
+    )
+    return (time.time() - startTime) / len(stepList)
+
+
+def main():
+    praatEXE = sys.argv[1] if len(sys.argv) > 1 else None
+
+    outputPath = tempfile.mkdtemp()
+    try:
+        fromWavFN = join(outputPath, "mary1.wav")
+        shutil.copy(join(_root, "mary1.wav"), fromWavFN)
+
+        durationParameters = duration_morph.getMorphParameters(
+            join(_root, "mary1.TextGrid"), join(_root, "mary2.TextGrid"), "words"
+        )
+        stepList = utils.generateStepList(NUM_STEPS)
+
+        backendList = [("psola", resynthesis.PsolaBackend())]
+        if praatEXE is not None:
+            backendList.append(("praat", resynthesis.PraatBackend(praatEXE)))
+            backendList.append(
+                ("praat (batched)", resynthesis.BatchedPraatBackend(praatEXE))
+            )
+        else:
+            print("No praat executable given; only timing the psola backend\n")
+
+        print("%16s %18s" % ("backend", "per step (ms)"))
+        for name, backend in backendList:
+            latency = _timeBackend(backend, fromWavFN, durationParameters, stepList)
+            print("%16s %18.1f" % (name, latency * 1000))
+    finally:
+        shutil.rmtree(outputPath)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+Runs many pitch or duration morphs from a manifest file.
+
+The manifest is a CSV file (with a header row) or a JSON file holding a
+list of objects.  Each row describes one morph with the fields:
+
+- morphType: "f0" or "duration"
+- fromWav, toWav: the source and target wav files
+- fromTG, toTG: the source and target textgrids
+- tierName: the tier whose intervals are aligned
+- steps: the number of steps (as in utils.generateStepList()) or a list of
+         step values (separated by semicolons in a CSV file)
+- outputPath (optional): where f0 morphs are saved; by default, the
+         folder of fromWav.  (changeDuration() always saves next to fromWav.)
+- outputName (optional): by default, "<from>_<to>_<morphType>_morph"
+- minPitch, maxPitch (optional): by default, 50 and 350
+
+Pitch is read from (or, if it doesn't exist yet, extracted by praat into)
+a .txt file next to each wav file, as in the examples.
+
+Completed jobs are recorded in a checkpoint file, so an interrupted run
+can be restarted with the same manifest and only the unfinished jobs are
+run again.  Jobs are started longest first, with their cost estimated from
+the length of the source audio and the number of steps, and the time each
+job took is reported against the time predicted for it.
+
+From the command line:
+    python -m promo.batch_morph manifest.csv --praat /path/to/praat
+"""
+
+import argparse
+import csv
+import hashlib
+import heapq
+import io
+import json
+import os
+from os.path import join
+import time
+from collections import namedtuple
+from concurrent import futures
+
+from praatio import pitch_and_intensity
+
+from promo import duration_morph
+from promo import f0_morph
+from promo.morph_utils import audio_scripts
+from promo.morph_utils import resynthesis
+from promo.morph_utils import utils
+
+DEFAULT_MIN_PITCH = 50
+DEFAULT_MAX_PITCH = 350
+
+F0 = "f0"
+DURATION = "duration"
+
+BatchJob = namedtuple(
+    "BatchJob",
+    [
+        "outputName",
+        "morphType",
+        "fromWavFN",
+        "toWavFN",
+        "fromTGFN",
+        "toTGFN",
+        "tierName",
+        "stepList",
+        "outputPath",
+        "minPitch",
+        "maxPitch",
+    ],
+)
+
+# A job in the order given by scheduleJobs()
+# cost: the estimate of estimateJobCost()
+ScheduledJob = namedtuple("ScheduledJob", ["job", "cost"])
+
+# The predicted and actual time (in seconds) of a job that was run
+# predictedTime is None if no earlier jobs were available to predict from
+JobReport = namedtuple(
+    "JobReport", ["outputName", "cost", "predictedTime", "actualTime"]
+)
+
+# jobReportList: a JobReport for each job that was run, in the order the
+#                jobs were started
+# predictedMakespan, actualMakespan: the time taken by the whole run
+#                                   (predictedMakespan may be None)
+BatchReport = namedtuple(
+    "BatchReport", ["jobReportList", "predictedMakespan", "actualMakespan"]
+)
+
+
+class ManifestException(Exception):
+    def __init__(self, manifestFN, rowNum, errorStr):
+        super(ManifestException, self).__init__()
+        self.manifestFN = manifestFN
+        self.rowNum = rowNum
+        self.errorStr = errorStr
+
+    def __str__(self):
+        return "Error in row %d of manifest '%s': %s" % (
+            self.rowNum,
+            self.manifestFN,
+            self.errorStr,
+        )
+
+
+class BatchMorphException(Exception):
+    def __init__(self, failedJobList):
+        super(BatchMorphException, self).__init__()
+        self.failedJobList = failedJobList
+
+    def __str__(self):
+        errorList = [
+            "%s: %s" % (outputName, repr(error))
+            for outputName, error in self.failedJobList
+        ]
+        return "%d morph job(s) failed:\n%s" % (
+            len(self.failedJobList),
+            "\n".join(errorList),
+        )
+
+
+def _parseStepList(steps):
+    if isinstance(steps, str):
+        steps = steps.strip()
+        if ";" not in steps and "." not in steps:
+            steps = int(steps)
+        else:
+            steps = [float(step) for step in steps.split(";") if step.strip() != ""]
+
+    if isinstance(steps, int):
+        return utils.generateStepList(steps)
+
+    return [float(step) for step in steps]
+
+
+def _readManifestRows(manifestFN):
+    if os.path.splitext(manifestFN)[1].lower() == ".json":
+        with io.open(manifestFN, "r", encoding="utf-8") as fd:
+            return json.load(fd)
+
+    with io.open(manifestFN, "r", encoding="utf-8", newline="") as fd:
+        return list(csv.DictReader(fd))
+
+
+def loadManifest(manifestFN):
+    """
+    Reads the morph jobs listed in a CSV or JSON manifest
+
+    Relative paths are taken to be relative to the manifest's folder.
+    """
+    rootPath = os.path.dirname(os.path.abspath(manifestFN))
+
+    def getPath(fn):
+        return os.path.normpath(join(rootPath, fn))
+
+    jobList = []
+    for rowNum, row in enumerate(_readManifestRows(manifestFN), 1):
+        row = {key: value for key, value in row.items() if value not in ["", None]}
+
+        try:
+            morphType = row["morphType"]
+            if morphType not in [F0, DURATION]:
+                raise ManifestException(
+                    manifestFN, rowNum, "unknown morphType '%s'" % morphType
+                )
+
+            fromWavFN = getPath(row["fromWav"])
+            toWavFN = getPath(row["toWav"])
+
+            outputName = row.get("outputName")
+            if outputName is None:
+                outputName = "%s_%s_%s_morph" % (
+                    os.path.splitext(os.path.basename(fromWavFN))[0],
+                    os.path.splitext(os.path.basename(toWavFN))[0],
+                    morphType,
+                )
+
+            job = BatchJob(
+                outputName,
+                morphType,
+                fromWavFN,
+                toWavFN,
+                getPath(row["fromTG"]),
+                getPath(row["toTG"]),
+                row["tierName"],
+                _parseStepList(row["steps"]),
+                getPath(row.get("outputPath", os.path.dirname(fromWavFN))),
+                float(row.get("minPitch", DEFAULT_MIN_PITCH)),
+                float(row.get("maxPitch", DEFAULT_MAX_PITCH)),
+            )
+        except KeyError as e:
+            raise ManifestException(manifestFN, rowNum, "missing field %s" % e)
+        except ValueError as e:
+            raise ManifestException(manifestFN, rowNum, str(e))
+
+        jobList.append(job)
+
+    return jobList
+
+
+def getJobKey(job):
+    """
+    Identifies a job in the checkpoint file
+
+    Any change to a job (e.g. to its steps) gives it a new key, so it is
+    run again.
+    """
+    return hashlib.sha1(repr(tuple(job)).encode("utf-8")).hexdigest()
+
+
+def _readCheckpoint(checkpointFN):
+    entryList = []
+    if checkpointFN is None or not os.path.exists(checkpointFN):
+        return entryList
+
+    with io.open(checkpointFN, "r", encoding="utf-8") as fd:
+        for line in fd:
+            # A run that was killed mid-write can leave a partial last line
+            try:
+                entryList.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return entryList
+
+
+def loadCheckpoint(checkpointFN):
+    """
+    Returns the keys of the jobs recorded as completed in checkpointFN
+    """
+    return set(entry["key"] for entry in _readCheckpoint(checkpointFN))
+
+
+def _recordCompletedJob(checkpointFN, job, cost, elapsedTime):
+    if checkpointFN is None:
+        return
+
+    entry = {
+        "key": getJobKey(job),
+        "outputName": job.outputName,
+        "cost": cost,
+        "time": elapsedTime,
+    }
+    with io.open(checkpointFN, "a", encoding="utf-8") as fd:
+        fd.write(json.dumps(entry) + "\n")
+        fd.flush()
+        os.fsync(fd.fileno())
+
+
+def _extractPitch(wavFN, praatEXE, minPitch, maxPitch):
+    pitchFN = os.path.splitext(wavFN)[0] + ".txt"
+    return pitch_and_intensity.extractPI(
+        wavFN, pitchFN, praatEXE, minPitch, maxPitch, forceRegenerate=False
+    )
+
+
+def _extractPitchFiles(jobList, praatEXE):
+    """
+    Extracts the pitch of each wav used by the f0 jobs, once per wav
+
+    Done before jobs are handed to a pool, so that the workers only read
+    the shared pitch files and never write them.
+    """
+    wavFNSet = set()
+    for job in jobList:
+        if job.morphType != F0:
+            continue
+
+        for wavFN in [job.fromWavFN, job.toWavFN]:
+            if wavFN not in wavFNSet:
+                wavFNSet.add(wavFN)
+                _extractPitch(wavFN, praatEXE, job.minPitch, job.maxPitch)
+
+
+def _loadPitch(wavFN, tgFN, tierName, praatEXE, minPitch, maxPitch):
+    pitchList = _extractPitch(wavFN, praatEXE, minPitch, maxPitch)
+    pitchList = [(time, pitch) for time, pitch, _ in pitchList]
+
+    return f0_morph.getPitchForIntervals(pitchList, tgFN, tierName)
+
+
+def runJob(job, praatEXE, backend=None):
+    """
+    Runs a single morph job
+
+    Returns the time it took, in seconds.
+    """
+    startTime = time.time()
+
+    if job.morphType == F0:
+        fromPitch = _loadPitch(
+            job.fromWavFN,
+            job.fromTGFN,
+            job.tierName,
+            praatEXE,
+            job.minPitch,
+            job.maxPitch,
+        )
+        toPitch = _loadPitch(
+            job.toWavFN, job.toTGFN, job.tierName, praatEXE, job.minPitch, job.maxPitch
+        )
+
+        utils.makeDir(job.outputPath)
+        f0_morph.f0Morph(
+            job.fromWavFN,
+            job.outputPath,
+            job.stepList,
+            job.outputName,
+            False,
+            fromPitch,
+            toPitch,
+            job.minPitch,
+            job.maxPitch,
+            praatEXE,
+            backend=backend,
+        )
+    else:
+        durationParameters = duration_morph.getMorphParameters(
+            job.fromTGFN, job.toTGFN, job.tierName
+        )
+        duration_morph.changeDuration(
+            job.fromWavFN,
+            durationParameters,
+            job.stepList,
+            job.outputName,
+            job.minPitch,
+            job.maxPitch,
+            praatEXE,
+            backend=backend,
+        )
+
+    return time.time() - startTime
+
+
+def estimateJobCost(job):
+    """
+    Estimates how long a job will take, in arbitrary units
+
+    The work grows with the length of the source audio and the number of
+    steps, so the cost is simply their product.
+    """
+    duration = audio_scripts.getSoundFileDuration(job.fromWavFN)
+
+    return duration * max(len(job.stepList), 1)
+
+
+def scheduleJobs(jobList, workers=1):
+    """
+    Orders jobs longest first and estimates the load on each worker
+
+    Starting the most costly jobs first means no long job is left to start
+    at the end of a run.  A pool hands each job to the first free worker,
+    so the load of each worker is estimated by giving each job, in order,
+    to the worker with the least work so far.  Returns the ScheduledJobs
+    in the order they should be started, and the estimated total cost
+    of each worker; the largest total is the predicted duration of the
+    whole run.
+    """
+    costList = [estimateJobCost(job) for job in jobList]
+    orderList = sorted(range(len(jobList)), key=lambda i: costList[i], reverse=True)
+
+    workerHeap = [(0, worker) for worker in range(max(workers, 1))]
+    scheduledJobList = []
+    for i in orderList:
+        load, worker = heapq.heappop(workerHeap)
+        scheduledJobList.append(ScheduledJob(jobList[i], costList[i]))
+        heapq.heappush(workerHeap, (load + costList[i], worker))
+
+    workerLoadList = [0] * len(workerHeap)
+    for load, worker in workerHeap:
+        workerLoadList[worker] = load
+
+    return scheduledJobList, workerLoadList
+
+
+def _getSecondsPerCost(entryList):
+    """
+    Calibrates estimateJobCost() against the times of completed jobs
+    """
+    totalCost = sum(entry.get("cost", 0) for entry in entryList)
+    totalTime = sum(entry["time"] for entry in entryList if "cost" in entry)
+    if totalCost == 0:
+        return None
+
+    return totalTime / totalCost
+
+
+def runBatch(jobList, praatEXE, checkpointFN=None, workers=None, backend=None):
+    """
+    Runs every job in jobList that is not recorded in checkpointFN
+
+    workers: if None or 1, the jobs are run one after another and the first
+             error is raised as is.  Otherwise, the jobs are run on a pool of
+             that many processes; every job is attempted and, if any of
+             them fail, a BatchMorphException listing them is raised at the
+             end.
+    backend: the resynthesis backend passed to f0Morph and changeDuration
+
+    Jobs are started longest first (see scheduleJobs()).  Each completed
+    job is added to checkpointFN as soon as it finishes.  With a pool, the
+    pitch of every wav is extracted up front, so that jobs sharing a wav
+    do not write its pitch file at the same time.
+
+    Returns a BatchReport of the jobs that were run.  Times are predicted,
+    before the run starts, from the jobs' costs at the rate measured for
+    the jobs already in checkpointFN.  If there are none, the predicted
+    times are None.
+    """
+    entryList = _readCheckpoint(checkpointFN)
+    completedSet = set(entry["key"] for entry in entryList)
+    pendingJobList = [job for job in jobList if getJobKey(job) not in completedSet]
+
+    scheduledJobList, workerLoadList = scheduleJobs(pendingJobList, workers or 1)
+
+    secondsPerCost = _getSecondsPerCost(entryList)
+    predictedTimeList = [None] * len(scheduledJobList)
+    predictedMakespan = None
+    if secondsPerCost is not None:
+        predictedTimeList = [cost * secondsPerCost for _, cost in scheduledJobList]
+        predictedMakespan = max(workerLoadList) * secondsPerCost
+
+    startTime = time.time()
+    timeList = []
+    if workers is None or workers == 1:
+        for job, cost in scheduledJobList:
+            elapsedTime = runJob(job, praatEXE, backend)
+            _recordCompletedJob(checkpointFN, job, cost, elapsedTime)
+            timeList.append(elapsedTime)
+    else:
+        _extractPitchFiles([job for job, _ in scheduledJobList], praatEXE)
+
+        failedJobList = []
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futureDict = {
+                executor.submit(runJob, job, praatEXE, backend): i
+                for i, (job, _) in enumerate(scheduledJobList)
+            }
+            timeList = [None] * len(scheduledJobList)
+
+            # Record each job as soon as it finishes, so that an interrupted
+            # run doesn't redo short jobs that were waiting on long ones
+            for future in futures.as_completed(futureDict):
+                i = futureDict[future]
+                job, cost = scheduledJobList[i]
+                try:
+                    elapsedTime = future.result()
+                except Exception as e:
+                    failedJobList.append((job.outputName, e))
+                else:
+                    _recordCompletedJob(checkpointFN, job, cost, elapsedTime)
+                    timeList[i] = elapsedTime
+
+        if len(failedJobList) > 0:
+            raise BatchMorphException(failedJobList)
+
+    actualMakespan = time.time() - startTime
+
+    jobReportList = [
+        JobReport(job.outputName, cost, predictedTime, elapsedTime)
+        for (job, cost), predictedTime, elapsedTime in zip(
+            scheduledJobList, predictedTimeList, timeList
+        )
+    ]
+
+    return BatchReport(jobReportList, predictedMakespan, actualMakespan)
+
+
+def _formatTime(seconds):
+    if seconds is None:
+        return "n/a"
+
+    return "%0.2f" % seconds
+
+
+def printReport(batchReport):
+    """
+    Prints the predicted and actual time of each job in a BatchReport
+
+    Predictions are only available once a checkpoint holds earlier jobs.
+    """
+    print("%-40s %10s %10s %10s" % ("job", "cost", "predicted", "actual"))
+    for jobReport in batchReport.jobReportList:
+        print(
+            "%-40s %10.2f %10s %10s"
+            % (
+                jobReport.outputName,
+                jobReport.cost,
+                _formatTime(jobReport.predictedTime),
+                _formatTime(jobReport.actualTime),
+            )
+        )
+    print(
+        "Total: %d job(s); predicted %ss, actual %ss"
+        % (
+            len(batchReport.jobReportList),
+            _formatTime(batchReport.predictedMakespan),
+            _formatTime(batchReport.actualMakespan),
+        )
+    )
+
+
+BACKEND_DICT = {
+    "praat": lambda praatEXE: resynthesis.PraatBackend(praatEXE),
+    "batched": lambda praatEXE: resynthesis.BatchedPraatBackend(praatEXE),
+    "psola": lambda praatEXE: resynthesis.PsolaBackend(),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Runs the pitch and duration morphs listed in a manifest"
+    )
+    parser.add_argument("manifest", help="a CSV or JSON manifest of morph jobs")
+    parser.add_argument("--praat", required=True, help="the praat executable")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="the number of worker processes"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="where completed jobs are recorded (default: <manifest>.done)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKEND_DICT.keys()),
+        default="praat",
+        help="how the audio is resynthesized",
+    )
+    args = parser.parse_args(argv)
+
+    checkpointFN = args.checkpoint
+    if checkpointFN is None:
+        checkpointFN = args.manifest + ".done"
+
+    jobList = loadManifest(args.manifest)
+    backend = BACKEND_DICT[args.backend](args.praat)
+
+    batchReport = runBatch(
+        jobList, args.praat, checkpointFN, args.workers, backend=backend
+    )
+    printReport(batchReport)
+    print(
+        "Ran %d of %d jobs (the rest were already done)"
+        % (len(batchReport.jobReportList), len(jobList))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,15 @@ Created on Jun 5, 2013
 import os
 from os.path import join
 import copy
+from concurrent import futures
 
 from praatio import textgrid
-from praatio import praat_scripts
-from praatio import data_points
-from praatio.utilities import constants
 
 from promo.morph_utils import utils
 from promo.morph_utils import audio_scripts
 from promo.morph_utils import plot_morphed_data
+from promo.morph_utils import resynthesis
+from promo.morph_utils import time_warp
 
 # This value is used to differentiate a praat interval boundary that marks
 # the start of one region and the end of another.
@@ -39,26 +39,97 @@ def changeDuration(
     outputMinPitch,
     outputMaxPitch,
     praatEXE,
+    backend=None,
+    inMemory=False,
+    includeAudio=True,
+    saveTiers=False,
 ):
     """
     Uses praat to morph duration in one file to duration in another
 
     Praat uses the PSOLA algorithm
+
+    backend: the resynthesis backend to use (see promo.morph_utils.resynthesis)
+             By default, a PraatBackend with praatEXE is used.
+             Use resynthesis.PsolaBackend() to resynthesize without praat
+             (praatEXE is then ignored).
+
+    inMemory: if True, nothing is written next to fromWavFN by default and
+              a list of resynthesis.MorphResult, one per step, is returned
+              instead.  Each result holds the step value, the duration
+              parameters, and (if includeAudio is True) the bytes of the
+              resynthesized wav file.  If saveTiers is True, the duration
+              tiers are still saved.
     """
+    if backend is None:
+        backend = resynthesis.PraatBackend(praatEXE)
 
     rootPath = os.path.split(fromWavFN)[0]
 
     # Prep output directories
-    outputPath = join(rootPath, "duration_resynthesized_wavs")
-    utils.makeDir(outputPath)
+    writeTiers = not inMemory or saveTiers
+    if not inMemory:
+        outputPath = join(rootPath, "duration_resynthesized_wavs")
+        utils.makeDir(outputPath)
 
-    durationTierPath = join(rootPath, "duration_tiers")
-    utils.makeDir(durationTierPath)
+    if writeTiers:
+        durationTierPath = join(rootPath, "duration_tiers")
+        utils.makeDir(durationTierPath)
 
     fromWavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+    durationParameters = padDurationParameters(durationParameters, fromWavDuration)
+
+    # Create the praat script for doing duration manipulation
+    stepDataList = []
+
+    def jobIter():
+        for stepAmount in stepList:
+            stepDurationParameters = [
+                (start, end, 1 + (ratio - 1) * stepAmount)
+                for start, end, ratio in durationParameters
+            ]
+
+            if inMemory:
+                stepDataList.append((stepAmount, stepDurationParameters))
+
+            outputPrefix = "%s_%0.3g" % (outputName, stepAmount)
+            durationTierFN = None
+            if writeTiers:
+                durationTierFN = join(
+                    durationTierPath, "%s.DurationTier" % outputPrefix
+                )
+            outputWavFN = None
+            if not inMemory:
+                outputWavFN = join(outputPath, "%s.wav" % outputPrefix)
+
+            yield resynthesis.ResynthesisJob(
+                outputPrefix, stepDurationParameters, durationTierFN, outputWavFN
+            )
+
+    if inMemory and not includeAudio:
+        backend = resynthesis.TierOnlyBackend()
+
+    wavBytesList = backend.resynthesizeDuration(
+        fromWavFN, jobIter(), outputMinPitch, outputMaxPitch
+    )
+
+    if inMemory:
+        return [
+            resynthesis.MorphResult(stepAmount, stepDurationParameters, wavBytes)
+            for (stepAmount, stepDurationParameters), wavBytes in zip(
+                stepDataList, wavBytesList
+            )
+        ]
+
 
+def padDurationParameters(durationParameters, wavDuration):
+    """
+    Returns a copy of durationParameters that covers the whole wav file
+
+    The regions before the first and after the last parameter are padded
+    with a ratio of 1 (no change in duration).
+    """
     durationParameters = copy.deepcopy(durationParameters)
-    # Pad any gaps with values of 1 (no change in duration)
 
     # No need to stretch out any pauses at the beginning
     if durationParameters[0][0] != 0:
@@ -66,35 +137,12 @@ def changeDuration(
         durationParameters.insert(0, tmpVar)
 
     # Or the end
-    if durationParameters[-1][1] < fromWavDuration:
+    if durationParameters[-1][1] < wavDuration:
         durationParameters.append(
-            (durationParameters[-1][1] + PRAAT_TIME_DIFF, fromWavDuration, 1)
+            (durationParameters[-1][1] + PRAAT_TIME_DIFF, wavDuration, 1)
         )
 
-    # Create the praat script for doing duration manipulation
-    for stepAmount in stepList:
-        durationPointList = []
-        for start, end, ratio in durationParameters:
-            percentChange = 1 + (ratio - 1) * stepAmount
-            durationPointList.append((start, percentChange))
-            durationPointList.append((end, percentChange))
-
-        outputPrefix = "%s_%0.3g" % (outputName, stepAmount)
-        durationTierFN = join(durationTierPath, "%s.DurationTier" % outputPrefix)
-        outputWavFN = join(outputPath, "%s.wav" % outputPrefix)
-        durationTier = data_points.PointObject2D(
-            durationPointList, constants.DataPointTypes.DURATION, 0, fromWavDuration
-        )
-        durationTier.save(durationTierFN)
-
-        praat_scripts.resynthesizeDuration(
-            praatEXE,
-            fromWavFN,
-            durationTierFN,
-            outputWavFN,
-            outputMinPitch,
-            outputMaxPitch,
-        )
+    return durationParameters
 
 
 def getBareParameters(wavFN):
@@ -177,23 +225,47 @@ def getManipulatedParamaters(tgFN, tierName, modFunc, filterFunc=None, useBlanks
     return durationParameters
 
 
-def outputMorphTextgrids(fromTGFN, durationParameters, stepList, outputTGName):
-    if outputTGName is not None:
-        utils.makeDir(os.path.split(outputTGName)[0])
+def outputMorphTextgrids(
+    fromTGFN, durationParameters, stepList, outputTGName, workers=None
+):
+    """
+    Saves a copy of fromTGFN retimed for every step in stepList
 
-    # Create the adjusted textgrids
-    if outputTGName is not None:
-        for stepFactor in stepList:
-            stepDurationParameters = [
-                (start, end, 1 + (ratio - 1) * stepFactor)
-                for start, end, ratio in durationParameters
+    The textgrid is read once and the timestamps of all of its tiers are
+    mapped for every step in a single pass.
+
+    workers: if set, the textgrids are built and saved on a pool of that
+             many processes
+    """
+    if outputTGName is None:
+        return
+
+    utils.makeDir(os.path.split(outputTGName)[0])
+
+    tg = utils.openTextgrid(fromTGFN, includeEmptyIntervals=False)
+    timeWarp = time_warp.TimeWarp(durationParameters)
+    stepTimeLists = timeWarp.mapTimesForSteps(_getTextgridTimes(tg), stepList)
+
+    argsList = [
+        (tg, newTimeList, "%s_%0.3g.TextGrid" % (outputTGName, stepFactor))
+        for stepFactor, newTimeList in zip(stepList, stepTimeLists)
+    ]
+
+    if workers is None or workers == 1:
+        for args in argsList:
+            _saveRetimedTextgrid(*args)
+    else:
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futureList = [
+                executor.submit(_saveRetimedTextgrid, *args) for args in argsList
             ]
-            adjustedTG = textgridManipulateDuration(fromTGFN, stepDurationParameters)
+            for future in futureList:
+                future.result()
 
-            outputTGFN = "%s_%0.3g.TextGrid" % (outputTGName, stepFactor)
-            adjustedTG.save(
-                outputTGFN, format="short_textgrid", includeBlankSpaces=True
-            )
+
+def _saveRetimedTextgrid(tg, newTimeList, outputTGFN):
+    adjustedTG = _retimeTextgrid(tg, newTimeList)
+    adjustedTG.save(outputTGFN, format="short_textgrid", includeBlankSpaces=True)
 
 
 def outputMorphPlot(
@@ -281,8 +353,8 @@ def textgridMorphDuration(fromTGFN, toTGFN):
 
     This assumes the two textgrids have the same number of segments.
     """
-    fromTG = textgrid.openTextgrid(fromTGFN, includeEmptyIntervals=False)
-    toTG = textgrid.openTextgrid(toTGFN, includeEmptyIntervals=False)
+    fromTG = utils.openTextgrid(fromTGFN, includeEmptyIntervals=False)
+    toTG = utils.openTextgrid(toTGFN, includeEmptyIntervals=False)
     adjustedTG = textgrid.Textgrid()
 
     adjustedTiers = []
@@ -298,112 +370,61 @@ def textgridMorphDuration(fromTGFN, toTGFN):
 
 
 def textgridManipulateDuration(tgFN, ratioList):
-    tg = textgrid.openTextgrid(tgFN, includeEmptyIntervals=False)
+    tg = utils.openTextgrid(tgFN, includeEmptyIntervals=False)
+    timeWarp = time_warp.TimeWarp(ratioList)
 
-    adjustedTG = textgrid.Textgrid()
+    return _retimeTextgrid(tg, timeWarp.mapTimes(_getTextgridTimes(tg)))
 
-    adjustedTiers = []
-    for tierName in tg.tierNames:
-        fromTier = tg.getTier(tierName)
 
-        adjustedTier = None
-        if isinstance(fromTier, textgrid.IntervalTier):
-            adjustedTier = _morphIntervalTier(fromTier, ratioList)
-        elif isinstance(fromTier, textgrid.PointTier):
-            adjustedTier = _morphPointTier(fromTier, ratioList)
-
-        assert adjustedTier is not None
-        adjustedTiers.append(adjustedTier)
+def _getTextgridTimes(tg):
+    """
+    Returns every timestamp in the tiers of tg, in the order used by _retimeTextgrid
+    """
+    timeList = []
+    for tierName in tg.tierNames:
+        tier = tg.getTier(tierName)
 
-    _addTiersToTextgrid(adjustedTG, adjustedTiers)
+        if isinstance(tier, textgrid.IntervalTier):
+            for start, stop, _ in tier.entries:
+                timeList.extend((start, stop))
+        elif isinstance(tier, textgrid.PointTier):
+            timeList.extend(timestamp for timestamp, _ in tier.entries)
+        else:
+            assert False
 
-    return adjustedTG
+        timeList.append(tier.maxTimestamp)
 
+    return timeList
 
-def _getTimeDiff(start, stop, ratio):
-    """Returns the time difference between interval and interval*ratio"""
-    return (ratio - 1) * (stop - start)
 
+def _retimeTextgrid(tg, newTimeList):
+    """
+    Returns a copy of tg with its timestamps replaced by newTimeList
+    """
+    adjustedTG = textgrid.Textgrid()
 
-def _morphPointTier(tier, ratioList):
-    cumulativeAdjustAmount = 0
+    adjustedTiers = []
     i = 0
-    newEntryList = []
-    for timestamp, label in tier.entries:
-        # Advance to the manipulation interval that coincides with the
-        # current point or appears after it
-        while i < len(ratioList) and timestamp > ratioList[i][1]:
-            rStart, rStop, ratio = ratioList[i]
-            cumulativeAdjustAmount += _getTimeDiff(rStart, rStop, ratio)
-            i += 1
-
-        newTime = timestamp + cumulativeAdjustAmount
-
-        # Alter the time if the point is within a manipulation interval
-        if i < len(ratioList):
-            rStart, rStop, ratio = ratioList[i]
-            if timestamp > rStart and timestamp <= rStop:
-                newTime += _getTimeDiff(rStart, timestamp, ratio)
+    for tierName in tg.tierNames:
+        tier = tg.getTier(tierName)
 
-        newEntryList.append((newTime, label))
+        if isinstance(tier, textgrid.IntervalTier):
+            newEntryList = [
+                (newTimeList[i + 2 * j], newTimeList[i + 2 * j + 1], label)
+                for j, (_, _, label) in enumerate(tier.entries)
+            ]
+            i += 2 * len(tier.entries)
+        else:
+            newEntryList = [
+                (newTimeList[i + j], label) for j, (_, label) in enumerate(tier.entries)
+            ]
+            i += len(tier.entries)
 
-    maxT = tier.maxTimestamp + cumulativeAdjustAmount
-    return tier.new(entries=newEntryList, maxTimestamp=maxT)
+        adjustedTiers.append(
+            tier.new(entries=newEntryList, maxTimestamp=newTimeList[i])
+        )
+        i += 1
 
+    _addTiersToTextgrid(adjustedTG, adjustedTiers)
 
-def _morphIntervalTier(tier, ratioList):
-    cumulativeAdjustAmount = 0
-    i = 0
-    newEntryList = []
-    for start, stop, label in tier.entries:
-        # Syncronize the manipulation and data intervals so that they
-        # are either overlapping or the manipulation interval is farther
-        # in the future.  This accumulates the effect of past
-        # manipulations so we know how much to offset timestamps
-        # for the current interval.
-        while (
-            i < len(ratioList) and start > ratioList[i][0] and start >= ratioList[i][1]
-        ):
-            rStart, rStop, ratio = ratioList[i]
-            cumulativeAdjustAmount = _getTimeDiff(rStart, rStop, ratio)
-            i += 1
-
-        newStart = start + cumulativeAdjustAmount
-        newStop = stop + cumulativeAdjustAmount
-
-        # Manipulate the interval further if there is overlap with a
-        # manipulation interval
-        while i < len(ratioList):
-            rStart, rStop, ratio = ratioList[i]
-
-            # currAdjustAmount is the ratio modified by percent change
-            # e.g. if the ratio is a boost of 1.2 but percent change is
-            # 0.5, ratio = 1.1 (it loses half of its effect)
-
-            # Adjusting the start position based on overlap with the
-            # current adjust interval
-            if start <= rStart:
-                pass
-            elif start > rStart and start <= rStop:
-                newStart += _getTimeDiff(rStart, start, ratio)
-
-            # Adjusting the stop position based on overlap with the
-            # current adjust interval
-            if stop >= rStop:
-                newStop += _getTimeDiff(rStart, rStop, ratio)
-            elif stop < rStop and stop >= rStart:
-                newStop += _getTimeDiff(rStart, stop, ratio)
-
-            # If we are beyond the current manipulation interval,
-            # then we need to move to the next one
-            if stop >= rStop:
-                cumulativeAdjustAmount += _getTimeDiff(rStart, rStop, ratio)
-                i += 1
-            # Otherwise, we are done manipulating the current interval
-            elif stop < rStop:
-                break
-
-        newEntryList.append((newStart, newStop, label))
-
-    newMax = tier.maxTimestamp + cumulativeAdjustAmount
-    return tier.new(entries=newEntryList, maxTimestamp=newMax)
+    return adjustedTG
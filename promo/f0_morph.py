@@ -7,18 +7,16 @@ Contains utilities for extracting, creating, and manipulating pitch files in
 praat.
 """
 
+import bisect
 from os.path import join
 
-from praatio import textgrid
-from praatio import data_points
-from praatio import praat_scripts
 from praatio.utilities import utils as praatio_utils
-from praatio.utilities import constants
 
 from promo.morph_utils import utils
-from promo.morph_utils import audio_scripts
 from promo.morph_utils import plot_morphed_data
 from promo.morph_utils import morph_sequence
+from promo.morph_utils import resynthesis
+from promo.morph_utils.pitch_contour import PitchContour
 
 
 class MissingPitchDataException(Exception):
@@ -34,15 +32,212 @@ class MissingPitchDataException(Exception):
         return txt
 
 
-def getPitchForIntervals(data, tgFN, tierName):
+def _getValuesInIntervals(dataList, timeList, intervalList):
+    """
+    Returns the points of dataList within each (start, stop) interval
+
+    timeList holds the (sorted) times of dataList; each interval is found
+    with a binary search.
+    """
+    blockList = []
+    for start, stop in intervalList:
+        startI = bisect.bisect_left(timeList, start)
+        endI = bisect.bisect_right(timeList, stop)
+        blockList.append(dataList[startI:endI])
+
+    return blockList
+
+
+def _mergeSortedBlocks(dataList, blockList):
+    """
+    Merges sorted, non-overlapping blocks of points into sorted dataList
+
+    Equivalent to sorting dataList together with the blocks but, as each
+    block falls into a gap in dataList (apart from, at most, a few points
+    at its ends), the blocks are spliced in whole and only their overlap
+    with dataList, if any, is sorted.
+    """
+    mergedList = []
+    i = 0
+    for block in blockList:
+        if len(block) == 0:
+            continue
+
+        startI = bisect.bisect_left(dataList, block[0], i)
+        endI = bisect.bisect_right(dataList, block[-1], startI)
+
+        mergedList.extend(dataList[i:startI])
+        if startI == endI:
+            mergedList.extend(block)
+        else:
+            mergedList.extend(sorted(dataList[startI:endI] + block))
+        i = endI
+
+    mergedList.extend(dataList[i:])
+
+    return mergedList
+
+
+def getPitchForIntervals(data, tgFN, tierName, asContours=False):
     """
     Preps data for use in f0Morph
+
+    Returns the points of data that fall in each labeled interval of
+    tierName, as one list per interval.  data is expected to be in time
+    order, so each interval can be found with a binary search.
+
+    asContours: if True, each interval's points are returned as a
+                PitchContour that is a view onto a single contour holding
+                all of data (no points are copied).  This is also done if
+                data is itself a PitchContour.
+    """
+    tg = utils.openTextgrid(tgFN, includeEmptyIntervals=False)
+    tier = tg.getTier(tierName)
+    intervalList = [(entry.start, entry.end) for entry in tier.entries]
+
+    if asContours or isinstance(data, PitchContour):
+        if not isinstance(data, PitchContour):
+            data = PitchContour.fromList(data)
+        return [data.getValuesInInterval(start, end) for start, end in intervalList]
+
+    timeList = [row[0] for row in data]
+    if any(timeList[i] > timeList[i + 1] for i in range(len(timeList) - 1)):
+        data = tier.getValuesInIntervals(data)
+        return [dataList for _, dataList in data]
+
+    return _getValuesInIntervals(data, timeList, intervalList)
+
+
+def iterPitchMorphSteps(
+    fromPitchData,
+    toPitchData,
+    stepList,
+    keepPitchRange=False,
+    keepAveragePitch=False,
+    sourcePitchDataList=None,
+    minIntervalLength=0.3,
+    alignmentCache=None,
+):
+    """
+    Yields the morphed pitch data of each step as (stepAmount, dataList)
+
+    This is the pitch-side work of f0Morph() (see there for the
+    arguments), without any resynthesis.  Steps are generated one at a
+    time so that only the current step is held in memory, no matter how
+    many steps were requested.  If fromPitchData holds PitchContour
+    objects, each step is yielded as a PitchContour.
     """
-    tg = textgrid.openTextgrid(tgFN, includeEmptyIntervals=False)
-    data = tg.getTier(tierName).getValuesInIntervals(data)
-    data = [dataList for _, dataList in data]
+    return iterPitchMorphStepsToTargets(
+        fromPitchData,
+        [toPitchData],
+        stepList,
+        keepPitchRange,
+        keepAveragePitch,
+        sourcePitchDataList,
+        minIntervalLength,
+        alignmentCache,
+    )[0]
+
+
+def iterPitchMorphStepsToTargets(
+    fromPitchData,
+    toPitchDataList,
+    stepList,
+    keepPitchRange=False,
+    keepAveragePitch=False,
+    sourcePitchDataList=None,
+    minIntervalLength=0.3,
+    alignmentCache=None,
+):
+    """
+    iterPitchMorphSteps() for several targets (one toPitchData each)
 
-    return data
+    Everything that only depends on the source (its relative timing, the
+    untouched source regions, and, with keepPitchRange, its sorted pitch
+    values) is computed once and shared by every target.  Returns one
+    step iterator per target.
+    """
+    # Find source pitch samples that will be mixed in with the target
+    # pitch samples later
+    nonMorphBlockList = []
+    if sourcePitchDataList is not None:
+        # The regions are found with a binary search, so the source must be
+        # in time order; it is sorted (once) if it isn't
+        sourceTimeList = [row[0] for row in sourcePitchDataList]
+        if any(
+            sourceTimeList[i] > sourceTimeList[i + 1]
+            for i in range(len(sourceTimeList) - 1)
+        ):
+            sourcePitchDataList = sorted(sourcePitchDataList)
+            sourceTimeList = [row[0] for row in sourcePitchDataList]
+
+        timeList = [(row[0][0], row[-1][0]) for row in fromPitchData]
+        timeList.sort()
+        endTime = sourcePitchDataList[-1][0]
+        invertedTimeList = praatio_utils.invertIntervalList(timeList, endTime)
+        invertedTimeList = [
+            (start, stop)
+            for start, stop in invertedTimeList
+            if stop - start > minIntervalLength
+        ]
+
+        nonMorphBlockList = _getValuesInIntervals(
+            sourcePitchDataList, sourceTimeList, invertedTimeList
+        )
+
+    try:
+        stepIterList = morph_sequence.iterMorphChunkedDataListsToTargets(
+            fromPitchData, toPitchDataList, stepList, alignmentCache
+        )
+    except IndexError:
+        raise MissingPitchDataException()
+
+    # Every step keeps the times of fromPitchData, so if those are in order,
+    # the source regions can be merged into each step without a sort
+    # (PitchContour steps are merged with PitchContour.merge() instead)
+    isOrdered = True
+    if len(fromPitchData) > 0 and all(
+        isinstance(subList, PitchContour) for subList in fromPitchData
+    ):
+        fromPitchData = fromPitchData[0].merge(fromPitchData[1:])
+    else:
+        fromPitchData = [row for subList in fromPitchData for row in subList]
+        isOrdered = all(
+            fromPitchData[i][0] < fromPitchData[i + 1][0]
+            for i in range(len(fromPitchData) - 1)
+        )
+
+    rangeReference = None
+    if keepPitchRange is True:
+        rangeReference = morph_sequence.getRangeReference(fromPitchData)
+
+    def processStep(outputDataList):
+        if keepPitchRange is True:
+            outputDataList = morph_sequence.morphRangeToReference(
+                outputDataList, rangeReference
+            )
+
+        if keepAveragePitch is True:
+            outputDataList = morph_sequence.morphAveragePitch(
+                outputDataList, fromPitchData
+            )
+
+        if sourcePitchDataList is not None and isinstance(outputDataList, PitchContour):
+            outputDataList = outputDataList.merge(nonMorphBlockList)
+        elif sourcePitchDataList is not None and isOrdered:
+            outputDataList = _mergeSortedBlocks(outputDataList, nonMorphBlockList)
+        elif sourcePitchDataList is not None:
+            for block in nonMorphBlockList:
+                outputDataList.extend(block)
+            outputDataList.sort()
+
+        return outputDataList
+
+    def processSteps(stepIter):
+        for stepAmount, outputDataList in stepIter:
+            yield stepAmount, processStep(outputDataList)
+
+    return [processSteps(stepIter) for stepIter in stepIterList]
 
 
 def f0Morph(
@@ -60,6 +255,12 @@ def f0Morph(
     keepAveragePitch=False,
     sourcePitchDataList=None,
     minIntervalLength=0.3,
+    workers=None,
+    backend=None,
+    inMemory=False,
+    includeAudio=True,
+    saveTiers=False,
+    alignmentCache=None,
 ):
     """
     Resynthesizes the pitch track from a source to a target wav file
@@ -78,101 +279,205 @@ def f0Morph(
     of the original speaker's pitch (average pitch and pitch range) by setting
     the appropriate flag)
 
+    fromPitchData and toPitchData may hold lists of (time, pitch) tuples or
+    PitchContour objects.
+
     sourcePitchDataList: if passed in, any regions unspecified by
                          fromPitchData will be sampled from this list.  In
                          essence, this allows one to leave segments of
                          the original pitch contour untouched by the
-                         morph process.
+                         morph process.  The list need not be in time
+                         order (it is sorted first if it isn't).
+
+    workers: if greater than 1, the pitch tiers of that many steps are
+             saved and resynthesized in parallel.  Output file names do not
+             depend on the order in which steps finish.  If any step fails,
+             the remaining steps still run and a
+             resynthesis.ResynthesisException listing every failed step is
+             raised afterwards.
+
+    backend: the resynthesis backend to use (see promo.morph_utils.resynthesis)
+             By default, a PraatBackend with praatEXE and workers is used.
+             Use resynthesis.PsolaBackend() to resynthesize without praat
+             (praatEXE is then ignored).
+
+    inMemory: if True, nothing is written to pitchPath by default and a list
+              of resynthesis.MorphResult, one per step, is returned instead.
+              Each result holds the step value, the pitch tier data (as a
+              list of (time, pitch) tuples), and
+              (if includeAudio is True) the bytes of the resynthesized wav
+              file.  If saveTiers is True, the pitch tiers are still saved
+              to pitchPath.  pitchPath may be None if neither saveTiers nor
+              doPlotPitchSteps are set.
+
+    alignmentCache: an optional morph_sequence.AlignmentCache.  When the
+                    same data is morphed repeatedly (e.g. with a different
+                    stepList or keepAveragePitch), passing the same cache
+                    each time skips the alignment after the first call.
+
+    To morph one source toward several targets, use f0MorphToTargets().
     """
-
-    fromDuration = audio_scripts.getSoundFileDuration(fromWavFN)
-
-    # Find source pitch samples that will be mixed in with the target
-    # pitch samples later
-    nonMorphPitchData = []
-    if sourcePitchDataList is not None:
-        timeList = sorted(fromPitchData)
-        timeList = [(row[0][0], row[-1][0]) for row in timeList]
-        endTime = sourcePitchDataList[-1][0]
-        invertedTimeList = praatio_utils.invertIntervalList(timeList, endTime)
-        invertedTimeList = [
-            (start, stop)
-            for start, stop in invertedTimeList
-            if stop - start > minIntervalLength
+    resultListList = f0MorphToTargets(
+        fromWavFN,
+        pitchPath,
+        stepList,
+        [outputName],
+        doPlotPitchSteps,
+        fromPitchData,
+        [toPitchData],
+        outputMinPitch,
+        outputMaxPitch,
+        praatEXE,
+        keepPitchRange,
+        keepAveragePitch,
+        sourcePitchDataList,
+        minIntervalLength,
+        workers,
+        backend,
+        inMemory,
+        includeAudio,
+        saveTiers,
+        alignmentCache,
+    )
+
+    if inMemory:
+        return [
+            result._replace(dataList=_toList(result.dataList))
+            for result in resultListList[0]
         ]
 
-        for start, stop in invertedTimeList:
-            pitchList = praatio_utils.getValuesInInterval(
-                sourcePitchDataList, start, stop
-            )
-            nonMorphPitchData.extend(pitchList)
-
-    # Iterative pitch tier data path
-    pitchTierPath = join(pitchPath, "pitchTiers")
-    resynthesizedPath = join(pitchPath, "f0_resynthesized_wavs")
-    for tmpPath in [pitchTierPath, resynthesizedPath]:
-        utils.makeDir(tmpPath)
 
-    # 1. Prepare the data for morphing - acquire the segments to merge
-    # (Done elsewhere, with the input fed into this function)
+def _toList(dataList):
+    if isinstance(dataList, PitchContour):
+        return dataList.toList()
 
-    # 2. Morph the fromData to the toData
-    try:
-        finalOutputList = morph_sequence.morphChunkedDataLists(
-            fromPitchData, toPitchData, stepList
-        )
-    except IndexError:
-        raise MissingPitchDataException()
+    return dataList
 
-    fromPitchData = [row for subList in fromPitchData for row in subList]
-    toPitchData = [row for subList in toPitchData for row in subList]
 
-    # 3. Save the pitch data and resynthesize the pitch
-    mergedDataList = []
-    for i in range(0, len(finalOutputList)):
-        outputDataList = finalOutputList[i]
+def f0MorphToTargets(
+    fromWavFN,
+    pitchPath,
+    stepList,
+    outputNameList,
+    doPlotPitchSteps,
+    fromPitchData,
+    toPitchDataList,
+    outputMinPitch,
+    outputMaxPitch,
+    praatEXE,
+    keepPitchRange=False,
+    keepAveragePitch=False,
+    sourcePitchDataList=None,
+    minIntervalLength=0.3,
+    workers=None,
+    backend=None,
+    inMemory=False,
+    includeAudio=True,
+    saveTiers=False,
+    alignmentCache=None,
+):
+    """
+    Morphs the pitch of one source toward each of several targets
 
-        if keepPitchRange is True:
-            outputDataList = morph_sequence.morphRange(outputDataList, fromPitchData)
+    Like f0Morph(), but with one toPitchData and one outputName per
+    target.  The source-side preparation (see
+    iterPitchMorphStepsToTargets()) is done once, and the steps of every
+    target are resynthesized together in a single call to the backend
+    (with the BatchedPraatBackend, a single praat call).
 
-        if keepAveragePitch is True:
-            outputDataList = morph_sequence.morphAveragePitch(
-                outputDataList, fromPitchData
-            )
+    If inMemory is True, one list of MorphResults is returned per target.
+    Unlike with f0Morph(), the pitch data of each result is a PitchContour
+    if fromPitchData was given as PitchContour objects.
+    """
+    assert len(outputNameList) == len(toPitchDataList)
 
-        if sourcePitchDataList is not None:
-            outputDataList.extend(nonMorphPitchData)
-            outputDataList.sort()
+    if backend is None:
+        backend = resynthesis.PraatBackend(praatEXE, workers)
 
-        stepOutputName = "%s_%0.3g" % (outputName, stepList[i])
-        pitchFNFullPath = join(pitchTierPath, "%s.PitchTier" % stepOutputName)
-        outputFN = join(resynthesizedPath, "%s.wav" % stepOutputName)
-        pointObj = data_points.PointObject2D(
-            outputDataList, constants.DataPointTypes.PITCH, 0, fromDuration
-        )
+    # Iterative pitch tier data path
+    writeTiers = not inMemory or saveTiers
+    if writeTiers or doPlotPitchSteps:
+        pitchTierPath = join(pitchPath, "pitchTiers")
+        utils.makeDir(pitchTierPath)
+    if not inMemory:
+        resynthesizedPath = join(pitchPath, "f0_resynthesized_wavs")
+        utils.makeDir(resynthesizedPath)
 
-        pointObj.save(pitchFNFullPath)
+    # 1. Prepare the data for morphing - acquire the segments to merge
+    # (Done elsewhere, with the input fed into this function)
 
-        outputTime, outputVals = zip(*outputDataList)
-        mergedDataList.append((outputTime, outputVals))
+    # 2. Morph the fromData to the toData
+    stepIterList = iterPitchMorphStepsToTargets(
+        fromPitchData,
+        toPitchDataList,
+        stepList,
+        keepPitchRange,
+        keepAveragePitch,
+        sourcePitchDataList,
+        minIntervalLength,
+        alignmentCache,
+    )
 
-        praat_scripts.resynthesizePitch(
-            praatEXE,
-            fromWavFN,
-            pitchFNFullPath,
-            outputFN,
-            outputMinPitch,
-            outputMaxPitch,
-        )
+    # 3. Save the pitch data and resynthesize the pitch
+    mergedDataListList = [[] for _ in toPitchDataList]
+    stepDataList = []
+
+    def jobIter():
+        for targetI, (outputName, stepIter) in enumerate(
+            zip(outputNameList, stepIterList)
+        ):
+            for stepAmount, outputDataList in stepIter:
+                # Only hold on to the generated contours if we need to plot them
+                if doPlotPitchSteps:
+                    outputTime, outputVals = zip(*outputDataList)
+                    mergedDataListList[targetI].append((outputTime, outputVals))
+
+                if inMemory:
+                    stepDataList.append((targetI, stepAmount, outputDataList))
+
+                stepOutputName = "%s_%0.3g" % (outputName, stepAmount)
+                pitchFNFullPath = None
+                if writeTiers:
+                    pitchFNFullPath = join(
+                        pitchTierPath, "%s.PitchTier" % stepOutputName
+                    )
+                outputFN = None
+                if not inMemory:
+                    outputFN = join(resynthesizedPath, "%s.wav" % stepOutputName)
+
+                yield resynthesis.ResynthesisJob(
+                    stepOutputName, outputDataList, pitchFNFullPath, outputFN
+                )
+
+    if inMemory and not includeAudio:
+        backend = resynthesis.TierOnlyBackend()
+
+    wavBytesList = backend.resynthesizePitch(
+        fromWavFN, jobIter(), outputMinPitch, outputMaxPitch
+    )
 
     # 4. (Optional) Plot the generated contours
     if doPlotPitchSteps:
-        fromTime, fromVals = zip(*fromPitchData)
-        toTime, toVals = zip(*toPitchData)
-
-        plot_morphed_data.plotF0(
-            (fromTime, fromVals),
-            (toTime, toVals),
-            mergedDataList,
-            join(pitchTierPath, "%s.png" % outputName),
-        )
+        fromTime, fromVals = zip(*[row for subList in fromPitchData for row in subList])
+        for outputName, toPitchData, mergedDataList in zip(
+            outputNameList, toPitchDataList, mergedDataListList
+        ):
+            toTime, toVals = zip(*[row for subList in toPitchData for row in subList])
+
+            plot_morphed_data.plotF0(
+                (fromTime, fromVals),
+                (toTime, toVals),
+                mergedDataList,
+                join(pitchTierPath, "%s.png" % outputName),
+            )
+
+    if inMemory:
+        resultListList = [[] for _ in toPitchDataList]
+        for (targetI, stepAmount, outputDataList), wavBytes in zip(
+            stepDataList, wavBytesList
+        ):
+            resultListList[targetI].append(
+                resynthesis.MorphResult(stepAmount, outputDataList, wavBytes)
+            )
+
+        return resultListList
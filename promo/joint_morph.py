@@ -0,0 +1,262 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+Morphs the pitch and the duration of a recording at the same time.
+
+Running duration_morph.changeDuration() and then f0_morph.f0Morph() on its
+output resynthesizes the audio twice (and requires the pitch of the
+intermediate file to be extracted again).  Here, each step's pitch tier and
+duration tier are applied to the source wav together, in a single
+resynthesis.
+"""
+
+from os.path import join
+
+from promo import duration_morph
+from promo import f0_morph
+from promo.morph_utils import audio_scripts
+from promo.morph_utils import resynthesis
+from promo.morph_utils import utils
+from promo.morph_utils.time_warp import TimeWarp
+
+
+def pitchAndDurationMorph(
+    fromWavFN,
+    outputPath,
+    stepList,
+    outputName,
+    fromPitchData,
+    toPitchData,
+    durationParameters,
+    outputMinPitch,
+    outputMaxPitch,
+    praatEXE,
+    keepPitchRange=False,
+    keepAveragePitch=False,
+    sourcePitchDataList=None,
+    minIntervalLength=0.3,
+    workers=None,
+    backend=None,
+    inMemory=False,
+    includeAudio=True,
+    saveTiers=False,
+):
+    """
+    Morphs the pitch and the duration of fromWavFN in one resynthesis per step
+
+    Each step morphs the pitch (as f0_morph.f0Morph() does with
+    fromPitchData and toPitchData) and the duration (as
+    duration_morph.changeDuration() does with durationParameters) by the
+    same amount.  The remaining arguments are as in f0Morph().
+
+    As in praat, the pitch tier used for the resynthesis is in the time of
+    the source wav; the duration tier is applied on top of it.  The
+    resynthesized wavs are saved in <outputPath>/joint_resynthesized_wavs
+    and the tiers in <outputPath>/pitchTiers and <outputPath>/duration_tiers.
+
+    inMemory: as in f0Morph().  The pitch data of each MorphResult is
+              retimed to match the resynthesized wav.
+    """
+    wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+    durationParameters = duration_morph.padDurationParameters(
+        durationParameters, wavDuration
+    )
+    pitchStepIter = f0_morph.iterPitchMorphSteps(
+        fromPitchData,
+        toPitchData,
+        stepList,
+        keepPitchRange,
+        keepAveragePitch,
+        sourcePitchDataList,
+        minIntervalLength,
+    )
+
+    cellIter = (
+        (
+            stepAmount,
+            "%s_%0.3g" % (outputName, stepAmount),
+            pitchDataList,
+            _getStepDurationParameters(durationParameters, stepAmount),
+        )
+        for stepAmount, pitchDataList in pitchStepIter
+    )
+
+    return _resynthesizeCells(
+        fromWavFN,
+        wavDuration,
+        outputPath,
+        cellIter,
+        outputMinPitch,
+        outputMaxPitch,
+        praatEXE,
+        workers,
+        backend,
+        inMemory,
+        includeAudio,
+        saveTiers,
+    )
+
+
+def pitchAndDurationMorphGrid(
+    fromWavFN,
+    outputPath,
+    pitchStepList,
+    durationStepList,
+    outputName,
+    fromPitchData,
+    toPitchData,
+    durationParameters,
+    outputMinPitch,
+    outputMaxPitch,
+    praatEXE,
+    keepPitchRange=False,
+    keepAveragePitch=False,
+    sourcePitchDataList=None,
+    minIntervalLength=0.3,
+    workers=None,
+    backend=None,
+    inMemory=False,
+    includeAudio=True,
+    saveTiers=False,
+):
+    """
+    Crosses a pitch continuum with a duration continuum
+
+    Every (pitchStep, durationStep) cell of the grid is resynthesized once,
+    as in pitchAndDurationMorph().  The pitch alignment, the pitch steps,
+    and the duration parameters of each duration step are computed only
+    once and shared by all cells.  Cells that would reproduce the source
+    (no pitch change and no duration change) are skipped.
+
+    With inMemory, the stepAmount of each MorphResult is a
+    (pitchStep, durationStep) tuple.  Otherwise, the files are named
+    <outputName>_p<pitchStep>_d<durationStep>.
+    """
+    wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+    durationParameters = duration_morph.padDurationParameters(
+        durationParameters, wavDuration
+    )
+    pitchStepDataList = list(
+        f0_morph.iterPitchMorphSteps(
+            fromPitchData,
+            toPitchData,
+            pitchStepList,
+            keepPitchRange,
+            keepAveragePitch,
+            sourcePitchDataList,
+            minIntervalLength,
+        )
+    )
+    durationStepDataList = [
+        (durationStep, _getStepDurationParameters(durationParameters, durationStep))
+        for durationStep in durationStepList
+    ]
+
+    cellIter = (
+        (
+            (pitchStep, durationStep),
+            "%s_p%0.3g_d%0.3g" % (outputName, pitchStep, durationStep),
+            pitchDataList,
+            stepDurationParameters,
+        )
+        for pitchStep, pitchDataList in pitchStepDataList
+        for durationStep, stepDurationParameters in durationStepDataList
+        if pitchStep != 0 or any(ratio != 1 for _, _, ratio in stepDurationParameters)
+    )
+
+    return _resynthesizeCells(
+        fromWavFN,
+        wavDuration,
+        outputPath,
+        cellIter,
+        outputMinPitch,
+        outputMaxPitch,
+        praatEXE,
+        workers,
+        backend,
+        inMemory,
+        includeAudio,
+        saveTiers,
+    )
+
+
+def _getStepDurationParameters(durationParameters, stepAmount):
+    return [
+        (start, end, 1 + (ratio - 1) * stepAmount)
+        for start, end, ratio in durationParameters
+    ]
+
+
+def _resynthesizeCells(
+    fromWavFN,
+    wavDuration,
+    outputPath,
+    cellIter,
+    outputMinPitch,
+    outputMaxPitch,
+    praatEXE,
+    workers,
+    backend,
+    inMemory,
+    includeAudio,
+    saveTiers,
+):
+    """
+    Resynthesizes each (stepAmount, stepName, pitch, duration) cell of a morph
+    """
+    if backend is None:
+        backend = resynthesis.PraatBackend(praatEXE, workers)
+
+    writeTiers = not inMemory or saveTiers
+    if writeTiers:
+        pitchTierPath = join(outputPath, "pitchTiers")
+        durationTierPath = join(outputPath, "duration_tiers")
+        for tmpPath in [outputPath, pitchTierPath, durationTierPath]:
+            utils.makeDir(tmpPath)
+    if not inMemory:
+        resynthesizedPath = join(outputPath, "joint_resynthesized_wavs")
+        for tmpPath in [outputPath, resynthesizedPath]:
+            utils.makeDir(tmpPath)
+
+    stepDataList = []
+
+    def jobIter():
+        for stepAmount, stepName, pitchDataList, stepDurationParameters in cellIter:
+            if inMemory:
+                timeWarp = TimeWarp.fromDurationTier(
+                    stepDurationParameters, wavDuration
+                )
+                stepDataList.append((stepAmount, timeWarp.retime(pitchDataList)))
+
+            pitchTierFN = None
+            durationTierFN = None
+            if writeTiers:
+                pitchTierFN = join(pitchTierPath, "%s.PitchTier" % stepName)
+                durationTierFN = join(durationTierPath, "%s.DurationTier" % stepName)
+            outputWavFN = None
+            if not inMemory:
+                outputWavFN = join(resynthesizedPath, "%s.wav" % stepName)
+
+            yield resynthesis.JointResynthesisJob(
+                stepName,
+                resynthesis.ResynthesisJob(stepName, pitchDataList, pitchTierFN, None),
+                resynthesis.ResynthesisJob(
+                    stepName, stepDurationParameters, durationTierFN, None
+                ),
+                outputWavFN,
+            )
+
+    if inMemory and not includeAudio:
+        backend = resynthesis.TierOnlyBackend()
+
+    wavBytesList = backend.resynthesizePitchAndDuration(
+        fromWavFN, jobIter(), outputMinPitch, outputMaxPitch
+    )
+
+    if inMemory:
+        return [
+            resynthesis.MorphResult(stepAmount, dataList, wavBytes)
+            for (stepAmount, dataList), wavBytes in zip(stepDataList, wavBytesList)
+        ]
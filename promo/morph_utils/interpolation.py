@@ -11,6 +11,8 @@ except ImportError:
 else:
     hasNumpy = True
 
+from promo.morph_utils.pitch_contour import PitchContour
+
 
 def _numpyCheck():
     if not hasNumpy:
@@ -29,10 +31,15 @@ def quadraticInterpolation(valueList2d, numDegrees, n, startTime=None, endTime=N
     n - number of points to output
     startTime/endTime/n - n points will be generated at evenly spaced
                           intervals between startTime and endTime
+
+    If valueList2d is a PitchContour, a PitchContour is returned.
     """
     _numpyCheck()
 
-    x, y = zip(*valueList2d)
+    if isinstance(valueList2d, PitchContour):
+        x, y = valueList2d.times, valueList2d.values
+    else:
+        x, y = zip(*valueList2d)
 
     if startTime is None:
         startTime = x[0]
@@ -43,6 +50,9 @@ def quadraticInterpolation(valueList2d, numDegrees, n, startTime=None, endTime=N
 
     newX = np.linspace(startTime, endTime, n)
 
+    if isinstance(valueList2d, PitchContour):
+        return PitchContour(newX, polyFunc(newX))
+
     retList = [(n, polyFunc(n)) for n in newX]
 
     return retList
@@ -19,6 +19,8 @@ results.
 
 import copy
 
+from promo.morph_utils.pitch_contour import PitchContour
+
 
 def _deletePoints(f0List, start, end):
     return [(timeV, f0V) for timeV, f0V in f0List if timeV < start or timeV > end]
@@ -26,8 +28,13 @@ def _deletePoints(f0List, start, end):
 
 class PitchAccent(object):
     def __init__(self, pointList):
-
-        self.pointList = copy.deepcopy(pointList)
+        """
+        pointList: a list of (time, f0) tuples or a PitchContour
+        """
+        if isinstance(pointList, PitchContour):
+            self.pointList = pointList.toList()
+        else:
+            self.pointList = copy.deepcopy(pointList)
 
         self.netLeftShift = 0
         self.netRightShift = 0
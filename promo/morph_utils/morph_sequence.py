@@ -15,9 +15,53 @@ Both dynamic time warping and morph, align two data lists in time.  However,
 dynamic time warping does this by analyzing the event structure and aligning
 events in the two signals as best it can
 (i.e. it changes when events happen in relative time while morph preserves
-when events happen in relative time).
+when events happen in relative time).  Pass alignment="dtw" to
+morphDataLists() and friends to align with dynamic time warping instead.
 """
 
+import array
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    hasNumpy = False
+else:
+    hasNumpy = True
+
+from promo.morph_utils.pitch_contour import PitchContour
+from promo.morph_utils.utils import CacheStats
+
+RELATIVE = "relative"
+DTW = "dtw"
+
+# For dtw alignment, how far apart (in relative time, from 0 to 1) two
+# points may be and still be aligned to each other
+DTW_BAND_WIDTH = 0.1
+
+
+def _numpyCheck():
+    if not hasNumpy:
+        raise ImportError(
+            "Numpy required to morph data as arrays. "
+            "Install numpy or use morphDataLists()"
+        )
+
+
+class UnknownAlignmentException(Exception):
+    def __init__(self, alignment):
+        super(UnknownAlignmentException, self).__init__()
+        self.alignment = alignment
+
+    def __str__(self):
+        return "Alignment must be one of %s. Input: %s" % (
+            repr([RELATIVE, DTW]),
+            repr(self.alignment),
+        )
+
 
 class RelativizeSequenceException(Exception):
     def __init__(self, dist):
@@ -31,6 +75,78 @@ class RelativizeSequenceException(Exception):
         )
 
 
+def _getFingerprint(arg):
+    """
+    Returns a hash of a list or array of numbers (other values are kept)
+    """
+    if hasNumpy and isinstance(arg, np.ndarray):
+        argBytes = np.ascontiguousarray(arg, dtype=np.float64).tobytes()
+    elif isinstance(arg, (list, tuple)):
+        argBytes = array.array("d", arg).tobytes()
+    else:
+        return arg
+
+    return hashlib.blake2b(argBytes, digest_size=16).digest()
+
+
+class AlignmentCache(object):
+    """
+    Remembers the alignments computed while morphing
+
+    The alignment between two data lists (which point in the target each
+    point in the source is paired with) only depends on their relative
+    times (and, for dtw alignment, their values).  Passing an
+    AlignmentCache to morphDataLists() and friends stores each alignment
+    under a hash of those, so morphing the same pair again (e.g. with a
+    different stepList) skips the alignment.
+
+    maxSize: the maximum number of alignments kept.  When it is exceeded,
+             the least recently used alignment is dropped.
+
+    A cache can be shared between threads.
+    """
+
+    def __init__(self, maxSize=128):
+        self.maxSize = maxSize
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getStats(self):
+        return CacheStats(self.hits, self.misses, self.evictions)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def getIndices(self, alignFunc, *argList):
+        """
+        Returns alignFunc(*argList), computing it only if needed
+        """
+        key = (alignFunc.__name__,) + tuple(_getFingerprint(arg) for arg in argList)
+
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        indices = alignFunc(*argList)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = indices
+            while len(self._cache) > self.maxSize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+        return indices
+
+
 def makeSequenceRelative(absVSequence):
     """
     Puts every value in a list on a continuum between 0 and 1
@@ -110,39 +226,26 @@ def _makeTimingAbsolute(relativeDataList, startTime, endTime):
     return absDataList
 
 
-def _getSmallestDifference(inputList, targetVal):
+def _getNearestIndex(sortedList, targetVal):
     """
-    Returns the value in inputList that is closest to targetVal
+    Returns the index of the value in sortedList that is closest to targetVal
 
-    Iteratively splits the dataset in two, so it should be pretty fast
+    sortedList must be sorted in ascending order.  If targetVal is equally
+    close to two values, the larger value is chosen.  If the closest value
+    appears more than once, the index of its first occurrence is returned.
     """
-    targetList = inputList[:]
-    retVal = None
-    while True:
-        # If we're down to one value, stop iterating
-        if len(targetList) == 1:
-            retVal = targetList[0]
-            break
-        halfPoint = int(len(targetList) / 2.0) - 1
-        a = targetList[halfPoint]
-        b = targetList[halfPoint + 1]
-
-        leftDiff = abs(targetVal - a)
-        rightDiff = abs(targetVal - b)
+    i = bisect.bisect_left(sortedList, targetVal)
 
-        # If the distance is 0, stop iterating, the targetVal is present
-        # in the inputList
-        if leftDiff == 0 or rightDiff == 0:
-            retVal = targetVal
-            break
-
-        # Look at left half or right half
+    if i == len(sortedList):
+        i = bisect.bisect_left(sortedList, sortedList[-1])
+    elif i > 0:
+        leftDiff = abs(targetVal - sortedList[i - 1])
+        rightDiff = abs(targetVal - sortedList[i])
         if leftDiff < rightDiff:
-            targetList = targetList[: halfPoint + 1]
-        else:
-            targetList = targetList[halfPoint + 1 :]
+            # Step back to the first occurrence of the smaller value
+            i = bisect.bisect_left(sortedList, sortedList[i - 1], 0, i)
 
-    return retVal
+    return i
 
 
 def _getNearestMappingIndexList(fromValList, toValList):
@@ -151,25 +254,497 @@ def _getNearestMappingIndexList(fromValList, toValList):
 
     The inputs should be in relative time, scaled from 0 to 1
     e.g. if you have [0, .1, .5., .9] and [0, .1, .2, 1]
-    will output [0, 1, 1, 2]
+    will output [0, 1, 2, 3]
+
+    toValList must be sorted.  Each lookup is a binary search, so the
+    whole mapping runs in O(n log m).
+    """
+
+    return [_getNearestIndex(toValList, fromVal) for fromVal in fromValList]
+
+
+def _getNearestMappingIndexArray(fromValArray, toValArray):
+    """
+    Array version of _getNearestMappingIndexList()
+
+    Returns the same indices, computed with a single searchsorted pass.
+    """
+    lastI = toValArray.shape[0] - 1
+
+    rightI = np.searchsorted(toValArray, fromValArray, side="left")
+    rightI = np.minimum(rightI, lastI)
+    leftI = np.maximum(rightI - 1, 0)
+
+    leftDiff = np.abs(fromValArray - toValArray[leftI])
+    rightDiff = np.abs(fromValArray - toValArray[rightI])
+    indexArray = np.where(leftDiff < rightDiff, leftI, rightI)
+
+    # Return the first occurrence of any repeated value
+    return np.searchsorted(toValArray, toValArray[indexArray], side="left")
+
+
+def _getDtwBand(fromTimeRel, toTimeRel, bandWidth):
+    """
+    Returns the first and last target index each source point may align to
+
+    The band holds the target points within bandWidth (in relative time)
+    of each source point.  It is widened, where needed, so that it always
+    holds the nearest target point and so that a path through it always
+    exists (e.g. across gaps in the target).
+    """
+    lastI = toTimeRel.shape[0] - 1
+
+    nearestArray = _getNearestMappingIndexArray(fromTimeRel, toTimeRel)
+    loArray = np.searchsorted(toTimeRel, fromTimeRel - bandWidth, side="left")
+    hiArray = np.searchsorted(toTimeRel, fromTimeRel + bandWidth, side="right") - 1
+    loArray = np.minimum(loArray, nearestArray)
+    hiArray = np.maximum(hiArray, nearestArray)
+
+    # Each row must start no later than one past the end of the previous row
+    loArray[1:] = np.minimum(loArray[1:], hiArray[:-1] + 1)
+    loArray[0] = 0
+    hiArray[-1] = lastI
+
+    return loArray, hiArray
+
+
+def _getDtwIndexArray(fromTimeRel, fromValues, toTimeRel, toValues, bandWidth):
+    """
+    Aligns the values of two sequences with dynamic time warping
+
+    Uses a Sakoe-Chiba band (see _getDtwBand()), so only the n * w cells
+    in the band are visited, where w is the number of target points in
+    the band.  The values are z-scored before being compared, so speakers
+    with different pitch ranges can still be aligned.  With several value
+    columns (one row per point), each column is z-scored on its own and
+    the distance between two points is the sum over the columns.
+
+    As the band is a share of relative time, w grows with the number of
+    target points m.  So the full backpointer matrix (n * w) is not kept:
+    only the costs of every k-th row (k = sqrt(n)) are kept in the forward
+    pass, and the backpointers of one block of k rows at a time are
+    recomputed from them while the path is walked back.  This takes
+    O(n * w) time (about twice the forward pass) and O(sqrt(n) * w + n + m)
+    memory.
+
+    Returns, for each source point, the index of the target point it is
+    aligned to (the middle one, if it is aligned to several).
+    """
+    fromValues = _zScore(fromValues)
+    toValues = _zScore(toValues)
+    numFrom = fromValues.shape[0]
+
+    loArray, hiArray = _getDtwBand(fromTimeRel, toTimeRel, bandWidth)
+    blockSize = max(int(np.ceil(np.sqrt(numFrom))), 1)
+
+    def getRow(i, prevCosts):
+        if i == 0:
+            return _getFirstDtwRow(fromValues[0], toValues, hiArray[0])
+
+        return _getDtwRow(
+            fromValues[i],
+            toValues,
+            prevCosts,
+            loArray[i - 1],
+            hiArray[i - 1],
+            loArray[i],
+            hiArray[i],
+        )
+
+    # Forward pass: keep the costs of the last row of each block
+    checkpointList = []
+    rowCosts = None
+    for i in range(numFrom):
+        rowCosts = getRow(i, rowCosts)[0]
+        if (i + 1) % blockSize == 0:
+            checkpointList.append(rowCosts)
+
+    # Walk the path back from the last point of each sequence, one block at
+    # a time.  Backpointers: 0 for (i - 1, j - 1), 1 for (i - 1, j) and 2
+    # for (i, j - 1)
+    firstIndexArray = np.zeros(numFrom, dtype=int)
+    lastIndexArray = np.zeros(numFrom, dtype=int)
+    i, j = numFrom - 1, hiArray[-1]
+    lastIndexArray[i] = j
+    for blockStart in reversed(range(0, numFrom, blockSize)):
+        rowCosts = None
+        if blockStart > 0:
+            rowCosts = checkpointList[blockStart // blockSize - 1]
+
+        backpointerList = []
+        for rowI in range(blockStart, min(blockStart + blockSize, numFrom)):
+            rowCosts, backpointerRow = getRow(rowI, rowCosts)
+            backpointerList.append(backpointerRow)
+
+        while i >= blockStart and (i > 0 or j > 0):
+            backpointer = backpointerList[i - blockStart][j - loArray[i]]
+            if backpointer != 2:
+                firstIndexArray[i] = j
+                i -= 1
+                lastIndexArray[i] = j - 1 if backpointer == 0 else j
+            if backpointer != 1:
+                j -= 1
+    firstIndexArray[0] = 0
+
+    return (firstIndexArray + lastIndexArray) // 2
+
+
+def _getFirstDtwRow(fromValue, toValues, hi):
+    """
+    Returns the costs and backpointers of the first row of the DTW matrix
+    """
+    rowCosts = np.cumsum(_getDistances(fromValue, toValues[: hi + 1]))
+    backpointerRow = np.full(hi + 1, 2, dtype=np.int8)
+    backpointerRow[0] = 0
+
+    return rowCosts, backpointerRow
+
+
+def _getDtwRow(fromValue, toValues, prevCosts, prevLo, prevHi, lo, hi):
+    """
+    Returns the costs and backpointers of one row of the DTW matrix
+
+    prevCosts holds the costs of the previous row for the target indices
+    prevLo to prevHi; the row covers the target indices lo to hi.
+    """
+    localCosts = _getDistances(fromValue, toValues[lo : hi + 1])
+
+    # The previous row's costs for the target indices lo - 1 to hi
+    paddedCosts = np.full(hi - lo + 2, np.inf)
+    start, end = max(prevLo, lo - 1), min(prevHi, hi)
+    paddedCosts[start - lo + 1 : end - lo + 2] = prevCosts[
+        start - prevLo : end - prevLo + 1
+    ]
+    diagonalCosts = paddedCosts[:-1]
+    verticalCosts = paddedCosts[1:]
+
+    fromBelowCosts = localCosts + np.minimum(diagonalCosts, verticalCosts)
+
+    # Steps within the row: cost[j] = min(fromBelow[j], local[j] +
+    # cost[j - 1]), or, with prefix sums, the running minimum of
+    # fromBelow - prefix, plus prefix
+    prefixCosts = np.cumsum(localCosts)
+    startCosts = fromBelowCosts - prefixCosts
+    runningMinCosts = np.minimum.accumulate(startCosts)
+    rowCosts = runningMinCosts + prefixCosts
+
+    backpointerRow = np.where(verticalCosts < diagonalCosts, 1, 0).astype(np.int8)
+    backpointerRow[runningMinCosts < startCosts] = 2
+
+    return rowCosts, backpointerRow
+
+
+def _getDistances(fromValue, toValueArray):
+    distanceArray = np.abs(fromValue - toValueArray)
+    if distanceArray.ndim == 2:
+        distanceArray = distanceArray.sum(axis=1)
+
+    return distanceArray
+
+
+def _zScore(valueArray):
+    valueArray = valueArray - valueArray.mean(axis=0)
+    std = valueArray.std(axis=0)
+    valueArray /= np.where(std > 0, std, 1)
+
+    return valueArray
+
+
+def _makeTimingRelativeArray(absoluteDataArray):
+    """
+    Array version of _makeTimingRelative()
+
+    Returns the relative times, the values (the remaining columns), and
+    the start and end time so that the process can be reversed
+    """
+    timeArray = absoluteDataArray[:, 0]
+
+    if timeArray.shape[0] < 2 or timeArray.min() == timeArray.max():
+        raise RelativizeSequenceException(timeArray.tolist())
+
+    startTime = timeArray.min()
+    endTime = timeArray.max()
+    relTimeArray = (timeArray - startTime) / (endTime - startTime)
+
+    return relTimeArray, absoluteDataArray[:, 1:], startTime, endTime
+
+
+def _toDataArray(dataList):
+    """
+    Returns dataList as a 2-D array, with one row per data point
+    """
+    if isinstance(dataList, PitchContour):
+        return dataList.toArray()
+
+    return np.asarray(dataList, dtype=float)
+
+
+def _makeStepOutput(fromList, timeRow, valueRow):
+    """
+    Packages one morphed step in the same format as the input data
+
+    PitchContour input gives PitchContour output, otherwise a list of
+    (time, value) tuples (or (time, value1, value2, ...) tuples, if there
+    are several value columns) is returned.
+    """
+    if isinstance(fromList, PitchContour):
+        return PitchContour(timeRow, valueRow)
+
+    if valueRow.ndim == 2:
+        return list(zip(timeRow.tolist(), *valueRow.T.tolist()))
+
+    return list(zip(timeRow.tolist(), valueRow.tolist()))
+
+
+def _getRelativeData(dataList):
+    """
+    Returns the relative times, values, and start and end time of dataList
+    """
+    return _makeTimingRelativeArray(_toDataArray(dataList))
+
+
+def _alignRelativeData(fromRelData, toRelData, alignmentCache=None, alignment=RELATIVE):
+    """
+    Aligns relative target data to relative source data
+
+    Both inputs are as returned by _getRelativeData().  If alignmentCache
+    is given, the alignment is looked up there first.  alignment is as in
+    morphDataLists().  Returns a tuple
+    holding the source relative times and values, the aligned target
+    relative times and values, and the source start and end times.  This
+    is everything needed to compute any morph step.
+    """
+    fromTimeRel, fromValues, fromStartTime, fromEndTime = fromRelData
+    toTimeRel, toValues = toRelData[:2]
+
+    assert fromValues.shape[1] == toValues.shape[1]
+
+    if alignment == RELATIVE:
+        alignFunc = _getNearestMappingIndexArray
+        argList = [fromTimeRel, toTimeRel]
+    else:
+        alignFunc = _getDtwIndexArray
+        argList = [fromTimeRel, fromValues, toTimeRel, toValues, DTW_BAND_WIDTH]
+
+    if alignmentCache is None:
+        indexArray = alignFunc(*argList)
+    else:
+        indexArray = alignmentCache.getIndices(alignFunc, *argList)
+
+    return (
+        fromTimeRel,
+        fromValues,
+        toTimeRel[indexArray],
+        toValues[indexArray],
+        fromStartTime,
+        fromEndTime,
+    )
+
+
+def _alignDataArrays(fromList, toList, alignmentCache=None, alignment=RELATIVE):
+    """
+    Aligns toList to fromList
+
+    See _alignRelativeData() for the output.
+    """
+    return _alignRelativeData(
+        _getRelativeData(fromList),
+        _getRelativeData(toList),
+        alignmentCache,
+        alignment,
+    )
+
+
+def _morphAlignedData(alignedData, stepArray):
+    """
+    Computes the morph for the steps in stepArray (a column vector)
+
+    Returns a time and value matrix with one row per step (see
+    morphDataMatrix())
+    """
+    (
+        fromTimeRel,
+        fromValues,
+        alignedToTimeRel,
+        alignedToValues,
+        fromStartTime,
+        fromEndTime,
+    ) = alignedData
+
+    # One row per step, one column per point (and, for the values, one
+    # layer per value column)
+    valueMatrix = fromValues + (
+        stepArray[:, :, np.newaxis] * (alignedToValues - fromValues)
+    )
+    if valueMatrix.shape[2] == 1:
+        valueMatrix = valueMatrix[:, :, 0]
+
+    timeMatrix = fromTimeRel + (stepArray * (alignedToTimeRel - fromTimeRel))
+    timeMatrix = (timeMatrix * (fromEndTime - fromStartTime)) + fromStartTime
+
+    return timeMatrix, valueMatrix
+
+
+def _checkAlignment(alignment):
+    if alignment not in [RELATIVE, DTW]:
+        raise UnknownAlignmentException(alignment)
+
+    if alignment == DTW:
+        _numpyCheck()
+
+
+def morphDataMatrix(
+    fromList, toList, stepList, alignmentCache=None, alignment=RELATIVE
+):
+    """
+    Morph fromList into toList for every value in stepList at once
+
+    Performs the same morph as morphDataLists() but computes every step
+    in a single numpy broadcast operation.
+
+    Returns two 2-D arrays, timeMatrix and valueMatrix, each with one row
+    per step in stepList and one column per point in fromList.  If the
+    data has more than one value column, valueMatrix is 3-D instead, with
+    valueMatrix[i, j] holding the values of point j at step i.
+
+    alignmentCache, alignment: see morphDataLists()
+    """
+    _numpyCheck()
+    _checkAlignment(alignment)
+
+    stepArray = np.asarray(stepList, dtype=float).reshape(-1, 1)
+    alignedData = _alignDataArrays(fromList, toList, alignmentCache, alignment)
+
+    return _morphAlignedData(alignedData, stepArray)
+
+
+class MorphPlan(object):
     """
+    A morph of fromList into toList that any step can be taken from
 
-    indexList = []
-    for fromTimestamp in fromValList:
-        smallestDiff = _getSmallestDifference(toValList, fromTimestamp)
-        i = toValList.index(smallestDiff)
-        indexList.append(i)
+    The two lists are aligned once, when the plan is made.  Every step is
+    a linear blend of fromList and the aligned toList, so after that,
+    at() computes any step in O(n), without knowing the other steps in
+    advance (e.g. for adaptive experiments that choose the next step as
+    they go).  Steps are the same as those of morphDataLists().
 
-    return indexList
+    alignmentCache, alignment: see morphDataLists()
 
+    Requires numpy.
+    """
+
+    def __init__(self, fromList, toList, alignmentCache=None, alignment=RELATIVE):
+        _numpyCheck()
+        _checkAlignment(alignment)
+
+        self.fromList = fromList
+        self._alignedData = _alignDataArrays(
+            fromList, toList, alignmentCache, alignment
+        )
 
-def morphDataLists(fromList, toList, stepList):
+    def at(self, stepAmount):
+        """
+        Returns the morphed data for stepAmount (0 is fromList, 1 is toList)
+
+        The data is a list of (time, value) tuples, or a PitchContour if
+        fromList is one.
+        """
+        return _getMorphStep(self.fromList, self._alignedData, stepAmount)
+
+    def iterSteps(self, stepList):
+        """
+        Yields (stepAmount, dataList) for each step, one step at a time
+
+        stepList may be any iterable, including a generator that picks
+        each step after seeing the previous one.
+        """
+        for stepAmount in stepList:
+            yield stepAmount, self.at(stepAmount)
+
+
+def _iterMorphSteps(
+    fromList,
+    toList,
+    stepList,
+    fromRelData=None,
+    alignmentCache=None,
+    alignment=RELATIVE,
+):
+    """
+    Like morphDataLists() but only ever holds a single step in memory
+
+    fromRelData: the output of _getRelativeData() for fromList, if it has
+                 already been computed
+    """
+    if not hasNumpy:
+        # The pure python version already computes one step at a time
+        for stepAmount, newPitchList in morphDataLists(
+            fromList, toList, stepList, alignmentCache, alignment
+        ):
+            yield stepAmount, newPitchList
+        return
+
+    if fromRelData is None:
+        fromRelData = _getRelativeData(fromList)
+    alignedData = _alignRelativeData(
+        fromRelData, _getRelativeData(toList), alignmentCache, alignment
+    )
+    for stepAmount in stepList:
+        yield stepAmount, _getMorphStep(fromList, alignedData, stepAmount)
+
+
+def _getMorphStep(fromList, alignedData, stepAmount):
+    """
+    Returns a single morphed step, in the same format as fromList
+    """
+    timeMatrix, valueMatrix = _morphAlignedData(
+        alignedData, np.array([[stepAmount]], dtype=float)
+    )
+
+    return _makeStepOutput(fromList, timeMatrix[0], valueMatrix[0])
+
+
+def morphDataLists(fromList, toList, stepList, alignmentCache=None, alignment=RELATIVE):
     """
     Iteratively morph fromList into toList using the values 0 to 1 in stepList
 
     stepList: a value of 0 means no change and a value of 1 means a complete
     change to the other value
+
+    If numpy is available, all steps are computed at once with
+    morphDataMatrix() and each step is converted back into a list of
+    tuples only when it is yielded.  If fromList is a PitchContour, each
+    step is yielded as a PitchContour instead.
+
+    Each point may have several values, e.g. the (time, pitch, intensity)
+    rows returned by praatio's pitch_and_intensity.extractPI(), given as
+    a list of tuples or as a 2-D array with one row per point.  The points
+    are aligned once and every value column is morphed together.  For
+    dtw alignment, all of the value columns are compared.
+
+    alignmentCache: an optional AlignmentCache.  If given, the alignment of
+                    fromList and toList is stored in it (or taken from it,
+                    if this pair was already aligned).
+
+    alignment: how the points of toList are paired with the points of
+               fromList.  With "relative" (the default), each point is
+               paired with the point at the closest relative time (see
+               the module docstring).  With "dtw" (requires numpy), the
+               values are aligned with dynamic time warping, within
+               DTW_BAND_WIDTH of each other in relative time, so that
+               events such as peaks are paired even if they occur at
+               different relative times.
     """
+    stepList = list(stepList)
+    _checkAlignment(alignment)
+
+    if hasNumpy:
+        timeMatrix, valueMatrix = morphDataMatrix(
+            fromList, toList, stepList, alignmentCache, alignment
+        )
+        for stepAmount, timeRow, valueRow in zip(stepList, timeMatrix, valueMatrix):
+            yield stepAmount, _makeStepOutput(fromList, timeRow, valueRow)
+        return
 
     # If there are more than 1 pitch value, then we align the data in
     # relative time.
@@ -186,7 +761,12 @@ def morphDataLists(fromList, toList, stepList):
     # If toList has more points, we'll might miss peaks or valleys
     fromTimeList = [dataTuple[0] for dataTuple in fromListRel]
     toTimeList = [dataTuple[0] for dataTuple in toListRel]
-    indexList = _getNearestMappingIndexList(fromTimeList, toTimeList)
+    if alignmentCache is None:
+        indexList = _getNearestMappingIndexList(fromTimeList, toTimeList)
+    else:
+        indexList = alignmentCache.getIndices(
+            _getNearestMappingIndexList, fromTimeList, toTimeList
+        )
     alignedToPitchRel = [toListRel[i] for i in indexList]
 
     for stepAmount in stepList:
@@ -194,53 +774,124 @@ def morphDataLists(fromList, toList, stepList):
 
         # Perform the interpolation
         for fromTuple, toTuple in zip(fromListRel, alignedToPitchRel):
-            fromTime, fromValue = fromTuple
-            toTime, toValue = toTuple
+            fromTime, fromValues = fromTuple[0], fromTuple[1:]
+            toTime, toValues = toTuple[0], toTuple[1:]
 
             # i + 1 b/c i_0 = 0 = no change
-            newValue = fromValue + (stepAmount * (toValue - fromValue))
+            newValues = tuple(
+                fromValue + (stepAmount * (toValue - fromValue))
+                for fromValue, toValue in zip(fromValues, toValues)
+            )
             newTime = fromTime + (stepAmount * (toTime - fromTime))
 
-            newPitchList.append((newTime, newValue))
+            newPitchList.append((newTime,) + newValues)
 
         newPitchList = _makeTimingAbsolute(newPitchList, fromStartTime, fromEndTime)
 
         yield stepAmount, newPitchList
 
 
-def morphChunkedDataLists(fromDataList, toDataList, stepList):
+def iterMorphChunkedDataLists(
+    fromDataList, toDataList, stepList, alignmentCache=None, alignment=RELATIVE
+):
     """
-    Morph one set of data into another, in a stepwise fashion
+    Morph one set of data into another, one step at a time
 
-    A convenience function.  Given a set of paired data lists,
-    this will morph each one individually.
+    A streaming version of morphChunkedDataLists().  Returns an iterator
+    that yields (stepAmount, dataList) for each step in stepList, where
+    dataList holds the morphed data of every chunk combined together
+    (a PitchContour if every chunk was given as a PitchContour).  Only one
+    step is held in memory at a time, regardless of the number
+    of steps.
 
-    Returns a single list with all data combined together.
+    alignmentCache, alignment: see morphDataLists()
+
+    Raises an IndexError immediately if no chunk has enough data to morph.
     """
 
-    assert len(fromDataList) == len(toDataList)
+    return iterMorphChunkedDataListsToTargets(
+        fromDataList, [toDataList], stepList, alignmentCache, alignment
+    )[0]
+
 
-    # Morph the fromDataList into the toDataList
-    outputList = []
-    for x, y in zip(fromDataList, toDataList):
+def iterMorphChunkedDataListsToTargets(
+    fromDataList, toDataListList, stepList, alignmentCache=None, alignment=RELATIVE
+):
+    """
+    Morph one set of data into each of several others, one step at a time
+
+    Like iterMorphChunkedDataLists() but with one toDataList per target.
+    The relative timing of each chunk of fromDataList is computed once and
+    shared by every target.  Returns one step iterator per target.
+
+    Raises an IndexError immediately if, for any target, no chunk has
+    enough data to morph.
+    """
+    stepList = list(stepList)
+    _checkAlignment(alignment)
+
+    # Chunks with fewer than two points can't be made relative (and are
+    # skipped below)
+    fromRelDataList = [None] * len(fromDataList)
+    if hasNumpy:
+        fromRelDataList = [
+            _getRelativeData(x) if len(x) >= 2 else None for x in fromDataList
+        ]
+
+    stepIterList = []
+    for toDataList in toDataListList:
+        assert len(fromDataList) == len(toDataList)
 
         # We cannot morph a region if there is no data or only
         # a single data point for either side
-        if (len(x) < 2) or (len(y) < 2):
-            continue
-
-        tmpList = [
-            outputPitchList for _, outputPitchList in morphDataLists(x, y, stepList)
+        chunkIterList = [
+            _iterMorphSteps(x, y, stepList, fromRelData, alignmentCache, alignment)
+            for x, y, fromRelData in zip(fromDataList, toDataList, fromRelDataList)
+            if len(x) >= 2 and len(y) >= 2
         ]
-        outputList.append(tmpList)
 
-    # Transpose list
-    finalOutputList = outputList.pop(0)
-    for subList in outputList:
-        for i, subsubList in enumerate(subList):
-            finalOutputList[i].extend(subsubList)
+        if len(chunkIterList) == 0:
+            raise IndexError("No region contains enough data to morph")
+
+        stepIterList.append(_iterMergedSteps(chunkIterList))
 
-    return finalOutputList
+    return stepIterList
+
+
+def _iterMergedSteps(chunkIterList):
+    for chunkOutputList in zip(*chunkIterList):
+        stepAmount = chunkOutputList[0][0]
+        outputList = [outputPitchList for _, outputPitchList in chunkOutputList]
+
+        if all(isinstance(output, PitchContour) for output in outputList):
+            stepDataList = PitchContour(
+                np.concatenate([output.times for output in outputList]),
+                np.concatenate([output.values for output in outputList]),
+            )
+        else:
+            stepDataList = [row for output in outputList for row in output]
+
+        yield stepAmount, stepDataList
+
+
+def morphChunkedDataLists(
+    fromDataList, toDataList, stepList, alignmentCache=None, alignment=RELATIVE
+):
+    """
+    Morph one set of data into another, in a stepwise fashion
+
+    A convenience function.  Given a set of paired data lists,
+    this will morph each one individually.
+
+    Returns a single list with all data combined together.
+    """
+
+    return [
+        stepDataList
+        for _, stepDataList in iterMorphChunkedDataLists(
+            fromDataList, toDataList, stepList, alignmentCache, alignment
+        )
+    ]
 
 
 def morphAveragePitch(fromDataList, toDataList):
@@ -254,6 +905,9 @@ def morphAveragePitch(fromDataList, toDataList):
     final average might not match the target average.
     """
 
+    if isinstance(fromDataList, PitchContour):
+        return _morphAveragePitchContour(fromDataList, toDataList)
+
     timeList, fromPitchList = zip(*fromDataList)
     toPitchList = [pitchVal for _, pitchVal in toDataList]
 
@@ -279,7 +933,28 @@ def morphAveragePitch(fromDataList, toDataList):
     return retDataList
 
 
-def morphRange(fromDataList, toDataList):
+def _morphAveragePitchContour(fromContour, toDataList):
+    """
+    PitchContour version of morphAveragePitch()
+    """
+    if isinstance(toDataList, PitchContour):
+        toPitchArray = toDataList.values
+    else:
+        toPitchArray = np.asarray([pitchVal for _, pitchVal in toDataList], float)
+
+    fromPitchArray = fromContour.values
+    fromAverage = fromPitchArray[fromPitchArray > 0].mean()
+    toAverage = toPitchArray[toPitchArray > 0].mean()
+
+    newPitchArray = fromPitchArray - fromAverage + toAverage
+
+    # Removing zeroes and negative pitch values
+    keepArray = newPitchArray > 0
+
+    return PitchContour(fromContour.times[keepArray], newPitchArray[keepArray])
+
+
+def morphRange(fromDataList, toDataList, interpolate=False):
     """
     Changes the scale of values in one distribution to that of another
 
@@ -288,18 +963,51 @@ def morphRange(fromDataList, toDataList):
     75% largest value in toDataList, etc.
 
     Small sample sizes will yield results that are not very meaningful
+
+    interpolate: if False, each value is replaced by the value in toDataList
+                 that sits at the nearest relative position.  If True
+                 (requires numpy), each value is mapped by its quantile
+                 (using the average rank of tied values) onto the
+                 linearly interpolated quantiles of toDataList.
+                 In both modes, identical input values always map to
+                 identical output values.
     """
+    if interpolate:
+        return _morphRangeInterpolated(fromDataList, toDataList)
 
-    # Isolate and sort pitch values
-    fromPitchList = [dataTuple[1] for dataTuple in fromDataList]
-    toPitchList = [dataTuple[1] for dataTuple in toDataList]
+    return morphRangeToReference(fromDataList, getRangeReference(toDataList))
+
+
+def getRangeReference(toDataList):
+    """
+    Returns the sorted values of toDataList and their relative positions
+
+    This is the part of morphRange() that only depends on toDataList, so it
+    can be reused when morphing many lists to the same range.
+    """
+    if isinstance(toDataList, PitchContour):
+        toPitchListSorted = np.sort(toDataList.values).tolist()
+    else:
+        toPitchListSorted = sorted(dataTuple[1] for dataTuple in toDataList)
+    toListRel = makeSequenceRelative(toPitchListSorted)[0]
 
-    fromPitchListSorted = sorted(fromPitchList)
-    toPitchListSorted = sorted(toPitchList)
+    return toPitchListSorted, toListRel
+
+
+def morphRangeToReference(fromDataList, rangeReference):
+    """
+    morphRange() with a reference from getRangeReference()
+    """
+    if isinstance(fromDataList, PitchContour):
+        return _morphRangeToReferenceContour(fromDataList, rangeReference)
+
+    toPitchListSorted, toListRel = rangeReference
+
+    # Isolate and sort pitch values
+    fromPitchListSorted = sorted(dataTuple[1] for dataTuple in fromDataList)
 
     # Bin pitch values between 0 and 1
     fromListRel = makeSequenceRelative(fromPitchListSorted)[0]
-    toListRel = makeSequenceRelative(toPitchListSorted)[0]
 
     # Find each values closest equivalent in the other list
     indexList = _getNearestMappingIndexList(fromListRel, toListRel)
@@ -309,10 +1017,82 @@ def morphRange(fromDataList, toDataList):
     # target list -> get corresponding pitch value = the new pitch value
     retList = []
     for time, pitch in fromDataList:
-        fromI = fromPitchListSorted.index(pitch)
+        fromI = bisect.bisect_left(fromPitchListSorted, pitch)
         toI = indexList[fromI]
         newPitch = toPitchListSorted[toI]
 
         retList.append((time, newPitch))
 
     return retList
+
+
+def _morphRangeToReferenceContour(fromContour, rangeReference):
+    """
+    PitchContour version of morphRangeToReference()
+    """
+    toPitchListSorted, toListRel = rangeReference
+
+    fromPitchArraySorted = np.sort(fromContour.values)
+    fromListRel = makeSequenceRelative(fromPitchArraySorted.tolist())[0]
+
+    indexArray = _getNearestMappingIndexArray(
+        np.asarray(fromListRel, dtype=np.float64),
+        np.asarray(toListRel, dtype=np.float64),
+    )
+    fromIArray = np.searchsorted(fromPitchArraySorted, fromContour.values, "left")
+    newPitchArray = np.asarray(toPitchListSorted, dtype=np.float64)[
+        indexArray[fromIArray]
+    ]
+
+    return PitchContour(fromContour.times, newPitchArray)
+
+
+def _morphRangeInterpolated(fromDataList, toDataList):
+    """
+    Quantile-mapping version of morphRange()
+
+    PitchContour input gives PitchContour output.
+
+    Each value in fromDataList is ranked among all n values and its rank
+    converted into a quantile between 0 and 1 (rank / (n - 1)).  Repeated
+    values share the average rank of their group, so a value's quantile
+    follows the share of values below it.  The new value is read off the
+    sorted values of toDataList, interpolating between neighbouring
+    values.  Runs in O(n log n).
+    """
+    _numpyCheck()
+
+    fromPitchArray = _getValueArray(fromDataList)
+    toPitchArray = _getValueArray(toDataList)
+
+    for pitchArray in [fromPitchArray, toPitchArray]:
+        if pitchArray.shape[0] < 2 or pitchArray.min() == pitchArray.max():
+            raise RelativizeSequenceException(pitchArray.tolist())
+
+    # np.unique sorts the values (via argsort) and gives each input value
+    # the index of its distinct value.  A group of count values, with
+    # firstRank values below it, holds the ranks firstRank to
+    # firstRank + count - 1.
+    uniqueArray, inverseArray, countArray = np.unique(
+        fromPitchArray, return_inverse=True, return_counts=True
+    )
+    firstRankArray = np.cumsum(countArray) - countArray
+    averageRankArray = firstRankArray + (countArray - 1) / 2.0
+    quantileArray = averageRankArray[inverseArray] / float(fromPitchArray.shape[0] - 1)
+    toPitchSorted = np.sort(toPitchArray)
+
+    toQuantileArray = np.linspace(0, 1, toPitchSorted.shape[0])
+    newPitchArray = np.interp(quantileArray, toQuantileArray, toPitchSorted)
+
+    if isinstance(fromDataList, PitchContour):
+        return PitchContour(fromDataList.times, newPitchArray)
+
+    timeList = [dataTuple[0] for dataTuple in fromDataList]
+    return list(zip(timeList, newPitchArray.tolist()))
+
+
+def _getValueArray(dataList):
+    if isinstance(dataList, PitchContour):
+        return dataList.values
+
+    return np.asarray([dataTuple[1] for dataTuple in dataList], float)
@@ -0,0 +1,131 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+A compact container for (time, value) data such as pitch contours.
+
+Throughout promo, contours are passed around as lists of tuples of the
+form [(time1, value1), (time2, value2), ...].  That is convenient but
+each point costs a tuple and two float objects.  PitchContour stores the
+same data in two contiguous float64 arrays instead.  It can be iterated
+over and indexed like the list of tuples, so it can be handed to code
+that expects the list format, and the core morph functions accept it
+directly without unpacking it point by point.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    hasNumpy = False
+else:
+    hasNumpy = True
+
+
+def _numpyCheck():
+    if not hasNumpy:
+        raise ImportError(
+            "Numpy required to use PitchContour. "
+            "Install numpy or use lists of (time, value) tuples"
+        )
+
+
+class PitchContour(object):
+    """
+    A contour of (time, value) points backed by two float64 arrays
+
+    Times are expected to be in ascending order.  Slicing, by index or by
+    time, returns a new PitchContour that shares memory with the original
+    (no data is copied).
+    """
+
+    __slots__ = ("times", "values")
+
+    def __init__(self, times, values):
+        _numpyCheck()
+
+        self.times = np.ascontiguousarray(times, dtype=np.float64)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+
+        if self.times.ndim != 1 or self.times.shape != self.values.shape:
+            raise ValueError(
+                "Times and values must be one-dimensional and of the same length"
+            )
+
+    @classmethod
+    def fromList(cls, dataList):
+        """
+        Builds a contour from a list of the form [(time1, value1), ...]
+        """
+        _numpyCheck()
+
+        dataArray = np.asarray(dataList, dtype=np.float64).reshape(-1, 2)
+
+        return cls(dataArray[:, 0], dataArray[:, 1])
+
+    def toList(self):
+        """
+        Returns the contour as a list of the form [(time1, value1), ...]
+        """
+        return list(zip(self.times.tolist(), self.values.tolist()))
+
+    def toArray(self):
+        """
+        Returns the contour as a 2-D array with one row per point
+        """
+        return np.column_stack((self.times, self.values))
+
+    def getValuesInInterval(self, start, end):
+        """
+        Returns the points with start <= time <= end
+
+        The times are searched with a binary search and the returned
+        contour is a view onto this one.
+        """
+        startI = np.searchsorted(self.times, start, side="left")
+        endI = np.searchsorted(self.times, end, side="right")
+
+        return PitchContour(self.times[startI:endI], self.values[startI:endI])
+
+    def merge(self, dataListList):
+        """
+        Returns a new contour with the points of this one and of each data list
+
+        Each data list is a PitchContour or a list of the form
+        [(time1, value1), ...].  The points are sorted by time and then by
+        value, as a list of tuples would be.
+        """
+        contourList = [self]
+        for dataList in dataListList:
+            if not isinstance(dataList, PitchContour):
+                dataList = PitchContour.fromList(dataList)
+            contourList.append(dataList)
+
+        times = np.concatenate([contour.times for contour in contourList])
+        values = np.concatenate([contour.values for contour in contourList])
+        order = np.lexsort((values, times))
+
+        return PitchContour(times[order], values[order])
+
+    def __len__(self):
+        return self.times.shape[0]
+
+    def __iter__(self):
+        return zip(self.times.tolist(), self.values.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return PitchContour(self.times[key], self.values[key])
+
+        return (float(self.times[key]), float(self.values[key]))
+
+    def __eq__(self, other):
+        if not isinstance(other, PitchContour):
+            return NotImplemented
+
+        return np.array_equal(self.times, other.times) and np.array_equal(
+            self.values, other.values
+        )
+
+    def __repr__(self):
+        return "PitchContour(%d points)" % len(self)
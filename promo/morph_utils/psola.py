@@ -0,0 +1,376 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+A pure numpy implementation of TD-PSOLA resynthesis.
+
+Pitch-synchronous overlap-add (PSOLA) is the same family of algorithms
+that praat uses for its overlap-add resynthesis.  The source audio is
+cut into two-period windows centered on its pitch marks (roughly, one
+per glottal pulse).  Those windows are then added back together at a
+new spacing: closer together to raise the pitch, further apart to lower
+it.  Repeating or skipping windows changes the duration, without
+changing the pitch.
+
+No external program or intermediate file is needed, so resynthesis can
+run anywhere numpy can.
+"""
+
+import io
+import wave
+
+try:
+    import numpy as np
+except ImportError:
+    hasNumpy = False
+else:
+    hasNumpy = True
+
+# The spacing of the pitch analysis frames and of the pitch marks placed
+# in unvoiced regions (in seconds)
+ANALYSIS_STEP = 0.01
+
+# Frames with a normalized autocorrelation peak below this are unvoiced
+VOICING_THRESHOLD = 0.45
+
+# A shorter lag is preferred over the strongest one if its autocorrelation
+# is at least this fraction of the strongest
+OCTAVE_TOLERANCE = 0.9
+
+# Frames quieter than this fraction of the loudest frame are unvoiced
+SILENCE_THRESHOLD = 0.03
+
+
+def _numpyCheck():
+    if not hasNumpy:
+        raise ImportError(
+            "Numpy required to do PSOLA resynthesis. "
+            "Install numpy or use praat for resynthesis"
+        )
+
+
+def readWav(fn):
+    """
+    Reads a PCM wav file (a file name or a file object)
+
+    Returns the samples as floats between -1 and 1 and the sample rate.
+    Multichannel audio is mixed down to a single channel.
+    """
+    _numpyCheck()
+
+    with wave.open(fn, "r") as audiofile:
+        params = audiofile.getparams()
+        frames = audiofile.readframes(params.nframes)
+
+    sampWidth = params.sampwidth
+    if sampWidth == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(float) - 128) / 128.0
+    elif sampWidth in [2, 4]:
+        dtype = np.int16 if sampWidth == 2 else np.int32
+        samples = np.frombuffer(frames, dtype=dtype).astype(float)
+        samples /= float(2 ** (8 * sampWidth - 1))
+    else:
+        raise ValueError("Unsupported sample width: %d bytes" % sampWidth)
+
+    samples = samples.reshape(-1, params.nchannels).mean(axis=1)
+
+    return samples, params.framerate
+
+
+def writeWav(fn, samples, sampleRate):
+    """
+    Writes samples (floats between -1 and 1) as a 16-bit mono wav file
+
+    fn can be a file name or a writable file object
+    """
+    _numpyCheck()
+
+    intSamples = np.round(np.clip(samples, -1, 1) * 32767).astype("<i2")
+
+    with wave.open(fn, "w") as audiofile:
+        audiofile.setnchannels(1)
+        audiofile.setsampwidth(2)
+        audiofile.setframerate(sampleRate)
+        audiofile.writeframes(intSamples.tobytes())
+
+
+def getWavBytes(samples, sampleRate):
+    """
+    Returns the contents of a wav file holding samples, without touching disk
+    """
+    buffer = io.BytesIO()
+    writeWav(buffer, samples, sampleRate)
+
+    return buffer.getvalue()
+
+
+def estimatePitch(samples, sampleRate, minPitch, maxPitch):
+    """
+    Estimates the pitch every ANALYSIS_STEP seconds using autocorrelation
+
+    Returns the frame center times (in samples), the pitch of each frame
+    (in Hz) and whether each frame is voiced.
+    """
+    _numpyCheck()
+
+    frameLength = int(round(3.0 * sampleRate / minPitch))
+    hop = int(round(ANALYSIS_STEP * sampleRate))
+
+    numFrames = max(1, 1 + int(np.ceil((samples.shape[0] - frameLength) / hop)))
+    paddedLength = (numFrames - 1) * hop + frameLength
+    paddedSamples = np.zeros(paddedLength)
+    paddedSamples[: samples.shape[0]] = samples[:paddedLength]
+
+    frameIndices = np.arange(numFrames)[:, None] * hop + np.arange(frameLength)
+    frames = paddedSamples[frameIndices]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+
+    # Autocorrelation of every frame at once, corrected for the taper of
+    # the analysis window
+    window = np.hanning(frameLength)
+    fftLength = 1 << int(np.ceil(np.log2(2 * frameLength)))
+    spectrum = np.fft.rfft(frames * window, fftLength)
+    autocorr = np.fft.irfft(np.abs(spectrum) ** 2, fftLength)[:, :frameLength]
+    windowSpectrum = np.fft.rfft(window, fftLength)
+    windowAutocorr = np.fft.irfft(np.abs(windowSpectrum) ** 2, fftLength)
+    windowAutocorr = windowAutocorr[:frameLength] / windowAutocorr[0]
+
+    energy = autocorr[:, 0].copy()
+    energy[energy == 0] = 1
+    autocorr = autocorr / energy[:, None] / np.maximum(windowAutocorr, 1e-3)
+
+    minLag = max(1, int(np.floor(sampleRate / float(maxPitch))))
+    maxLag = min(frameLength - 2, int(np.ceil(sampleRate / float(minPitch))))
+    # To avoid octave errors, take the shortest lag whose peak comes close
+    # to the strongest peak
+    lagAutocorr = autocorr[:, minLag - 1 : maxLag + 2]
+    centerAutocorr = lagAutocorr[:, 1:-1]
+    isPeak = (centerAutocorr >= lagAutocorr[:, :-2]) & (
+        centerAutocorr >= lagAutocorr[:, 2:]
+    )
+    maxStrength = np.max(np.where(isPeak, centerAutocorr, -np.inf), axis=1)
+    isCandidate = isPeak & (centerAutocorr >= OCTAVE_TOLERANCE * maxStrength[:, None])
+    lagArray = np.argmax(isCandidate, axis=1) + minLag
+    strengthArray = autocorr[np.arange(numFrames), lagArray]
+
+    rmsArray = np.sqrt(np.mean(frames**2, axis=1))
+    voicedArray = (strengthArray > VOICING_THRESHOLD) & (
+        rmsArray > SILENCE_THRESHOLD * rmsArray.max()
+    )
+
+    centerArray = np.arange(numFrames) * hop + frameLength / 2.0
+    pitchArray = sampleRate / lagArray.astype(float)
+
+    return centerArray, pitchArray, voicedArray
+
+
+def getPitchMarks(samples, sampleRate, minPitch, maxPitch):
+    """
+    Places analysis marks on the source audio
+
+    In voiced regions, marks are placed one pitch period apart, on the
+    largest sample near where the next period is expected.  In unvoiced
+    regions, marks are placed every ANALYSIS_STEP seconds.
+
+    Returns the mark positions (in samples) and whether each mark is voiced.
+    """
+    centerArray, pitchArray, voicedArray = estimatePitch(
+        samples, sampleRate, minPitch, maxPitch
+    )
+
+    numSamples = samples.shape[0]
+    unvoicedStep = ANALYSIS_STEP * sampleRate
+
+    markList = []
+    markVoicingList = []
+    t = 0.0
+    while t < numSamples:
+        frameI = np.searchsorted(centerArray, t)
+        frameI = min(frameI, centerArray.shape[0] - 1)
+
+        if not voicedArray[frameI]:
+            markList.append(int(t))
+            markVoicingList.append(False)
+            t += unvoicedStep
+            continue
+
+        period = sampleRate / pitchArray[frameI]
+
+        # Look for the pulse within a fraction of a period of where it is
+        # expected.  At the start of a voiced region, look over a full period.
+        if len(markVoicingList) > 0 and markVoicingList[-1]:
+            searchStart = int(t - 0.2 * period)
+            searchEnd = int(t + 0.2 * period) + 1
+        else:
+            searchStart = int(t)
+            searchEnd = int(t + period) + 1
+        searchStart = max(searchStart, markList[-1] + 1 if markList else 0)
+        if searchStart >= numSamples:
+            break
+        searchEnd = min(max(searchEnd, searchStart + 1), numSamples)
+
+        mark = searchStart + int(np.argmax(samples[searchStart:searchEnd]))
+        markList.append(mark)
+        markVoicingList.append(True)
+        t = mark + period
+
+    return np.array(markList, dtype=int), np.array(markVoicingList, dtype=bool)
+
+
+def psola(
+    samples,
+    sampleRate,
+    markArray,
+    voicedArray,
+    pitchList=None,
+    timeMapping=None,
+    outputLength=None,
+):
+    """
+    Resynthesizes audio from its analysis marks with TD-PSOLA
+
+    pitchList: a list of (time, f0) points.  Voiced regions take their new
+               pitch from these points (interpolated linearly and held
+               constant past the first and last points, like a praat
+               PitchTier).  If None, the pitch is unchanged.
+    timeMapping: a pair of increasing arrays (sourceTimes, outputTimes),
+                 in samples, that map source time onto output time.  If
+                 None, the duration is unchanged.
+    outputLength: the number of output samples.  By default, the length
+                  of the source, mapped through timeMapping.
+    """
+    _numpyCheck()
+
+    numSamples = samples.shape[0]
+    if timeMapping is None:
+        timeMapping = (np.array([0.0, numSamples]), np.array([0.0, numSamples]))
+    sourceTimes, outputTimes = timeMapping
+
+    if outputLength is None:
+        outputLength = int(round(np.interp(numSamples, sourceTimes, outputTimes)))
+
+    if pitchList is not None and len(pitchList) > 0:
+        pitchTimes = np.array([row[0] for row in pitchList]) * sampleRate
+        pitchValues = np.array([row[1] for row in pitchList], dtype=float)
+    else:
+        pitchTimes = None
+
+    # Each analysis window spans from the previous mark to the next one
+    paddedMarks = np.concatenate(([0], markArray, [numSamples]))
+    halfWidthArray = np.maximum(
+        np.maximum(markArray - paddedMarks[:-2], paddedMarks[2:] - markArray), 1
+    )
+
+    maxHalfWidth = int(halfWidthArray.max())
+    paddedSamples = np.concatenate(
+        (np.zeros(maxHalfWidth), samples, np.zeros(maxHalfWidth))
+    )
+    output = np.zeros(outputLength + 2 * maxHalfWidth + 1)
+    weight = np.zeros(outputLength + 2 * maxHalfWidth + 1)
+
+    t = float(np.interp(markArray[0], sourceTimes, outputTimes))
+    while t < outputLength:
+        sourceT = np.interp(t, outputTimes, sourceTimes)
+
+        markI = min(np.searchsorted(markArray, sourceT), markArray.shape[0] - 1)
+        if markI > 0 and sourceT - markArray[markI - 1] < markArray[markI] - sourceT:
+            markI -= 1
+
+        mark = markArray[markI]
+        halfWidth = int(halfWidthArray[markI])
+
+        if voicedArray[markI] and pitchTimes is not None:
+            period = sampleRate / np.interp(sourceT, pitchTimes, pitchValues)
+        elif markI + 1 < markArray.shape[0]:
+            period = float(markArray[markI + 1] - mark)
+        else:
+            period = float(halfWidth)
+
+        window = np.hanning(2 * halfWidth + 1)
+        segment = paddedSamples[
+            mark + maxHalfWidth - halfWidth : mark + maxHalfWidth + halfWidth + 1
+        ]
+
+        outputI = int(round(t)) + maxHalfWidth - halfWidth
+        output[outputI : outputI + 2 * halfWidth + 1] += segment * window
+        weight[outputI : outputI + 2 * halfWidth + 1] += window
+
+        t += max(period, 1.0)
+
+    # Where windows pile up (higher pitch), scale the sum back down
+    output /= np.maximum(weight, 1.0)
+
+    return output[maxHalfWidth : maxHalfWidth + outputLength]
+
+
+def resynthesizePitch(samples, sampleRate, pitchList, minPitch, maxPitch):
+    """
+    Gives the audio in samples the pitch contour in pitchList
+
+    pitchList is a list of (time, f0) points, as produced by
+    morph_sequence.  Returns the resynthesized samples.
+    """
+    markArray, voicedArray = getPitchMarks(samples, sampleRate, minPitch, maxPitch)
+
+    return psola(samples, sampleRate, markArray, voicedArray, pitchList)
+
+
+def getDurationMapping(durationParameters, duration):
+    """
+    Maps source time onto output time for a list of duration parameters
+
+    durationParameters is a list of (start, end, ratio) tuples, as used by
+    duration_morph.changeDuration().  They are treated like the points of
+    a praat DurationTier: the ratio is interpolated linearly between
+    points and held constant before the first and after the last point.
+
+    Returns two increasing arrays (sourceTimes, outputTimes), in seconds,
+    that cover the source from 0 to duration.
+    """
+    _numpyCheck()
+
+    pointList = []
+    for start, end, ratio in durationParameters:
+        pointList.append((start, ratio))
+        pointList.append((end, ratio))
+    pointList.sort(key=lambda point: point[0])
+
+    knotArray = np.array([time for time, _ in pointList], dtype=float)
+    ratioArray = np.array([ratio for _, ratio in pointList], dtype=float)
+
+    # Hold the first and last ratios out to the edges of the audio
+    if knotArray[0] > 0:
+        knotArray = np.concatenate(([0.0], knotArray))
+        ratioArray = np.concatenate((ratioArray[:1], ratioArray))
+    if knotArray[-1] < duration:
+        knotArray = np.concatenate((knotArray, [duration]))
+        ratioArray = np.concatenate((ratioArray, ratioArray[-1:]))
+
+    # The output time is the integral of the ratio over the source time
+    areaArray = np.diff(knotArray) * (ratioArray[:-1] + ratioArray[1:]) / 2.0
+    outputArray = np.concatenate(([0.0], np.cumsum(areaArray)))
+
+    return knotArray, outputArray
+
+
+def resynthesizeDuration(samples, sampleRate, durationParameters, minPitch, maxPitch):
+    """
+    Stretches and shrinks the audio in samples by durationParameters
+
+    durationParameters is a list of (start, end, ratio) tuples, as used by
+    duration_morph.changeDuration().  The pitch is left unchanged.
+    Returns the resynthesized samples.
+    """
+    markArray, voicedArray = getPitchMarks(samples, sampleRate, minPitch, maxPitch)
+
+    duration = samples.shape[0] / float(sampleRate)
+    sourceTimes, outputTimes = getDurationMapping(durationParameters, duration)
+
+    return psola(
+        samples,
+        sampleRate,
+        markArray,
+        voicedArray,
+        timeMapping=(sourceTimes * sampleRate, outputTimes * sampleRate),
+    )
@@ -0,0 +1,814 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+Utilities for running the resynthesis of morph steps.
+
+Each step of a morph is resynthesized independently of the others (e.g.
+by its own praat process), so the steps can be run in parallel.
+
+The resynthesis itself is done by a backend.  f0Morph() and
+changeDuration() describe every step as a ResynthesisJob and hand the
+jobs over to the backend, which is responsible for producing the output
+wav files.
+
+- PraatBackend runs one praat process per step (the default)
+- BatchedPraatBackend runs a single praat process for all steps.  The
+  source wav is loaded and analyzed only once.
+- PsolaBackend resynthesizes in-process with numpy (see psola.py); praat
+  is not needed.
+- TierOnlyBackend does no resynthesis at all and only saves the tiers.
+- CachingBackend wraps another backend and keeps its outputs in an
+  on-disk cache, so steps that were already resynthesized are not
+  resynthesized again.
+
+Other backends can be plugged in by subclassing ResynthesisBackend.
+"""
+
+import io
+import os
+from os.path import join
+import hashlib
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent import futures
+
+from praatio import data_points
+from praatio import praat_scripts
+from praatio.utilities import constants
+from praatio.utilities import utils as praatio_utils
+
+from promo.morph_utils import audio_scripts
+from promo.morph_utils import psola
+from promo.morph_utils.utils import CacheStats
+
+# A single step to resynthesize
+# dataList: for pitch, a list of (time, f0) points; for duration, a list
+#           of (start, end, ratio) duration parameters
+# tierFN: where to save the PitchTier or DurationTier.  If None, the tier is
+#         only written to a temporary file, and only if the backend needs it.
+# outputWavFN: where to save the resynthesized audio.  If None, the audio is
+#              returned by the backend as the bytes of a wav file.
+ResynthesisJob = namedtuple(
+    "ResynthesisJob", ["stepName", "dataList", "tierFN", "outputWavFN"]
+)
+
+# A single step that changes both the pitch and the duration
+# pitchJob, durationJob: ResynthesisJobs with the data and tier file name of
+#                        each manipulation (their outputWavFN is not used).
+#                        As in praat, the pitch points are in the time of
+#                        the source wav, before the duration is changed.
+# outputWavFN: as in ResynthesisJob
+JointResynthesisJob = namedtuple(
+    "JointResynthesisJob", ["stepName", "pitchJob", "durationJob", "outputWavFN"]
+)
+
+# Used in place of a praatio tier type for JointResynthesisJobs
+PITCH_AND_DURATION = "PitchAndDuration"
+
+# The in-memory result of one step of a morph
+# dataList: the data of the tier (as in ResynthesisJob)
+# wavBytes: the contents of the resynthesized wav file, or None
+MorphResult = namedtuple("MorphResult", ["stepAmount", "dataList", "wavBytes"])
+
+
+class ResynthesisException(Exception):
+    def __init__(self, failedStepList):
+        super(ResynthesisException, self).__init__()
+        self.failedStepList = failedStepList
+
+    def __str__(self):
+        errorList = [
+            "%s: %s" % (stepName, repr(error))
+            for stepName, error in self.failedStepList
+        ]
+        return "Resynthesis failed for %d step(s):\n%s" % (
+            len(self.failedStepList),
+            "\n".join(errorList),
+        )
+
+
+def runSteps(stepFunc, stepArgsIter, workers=None):
+    """
+    Calls stepFunc once for every (stepName, args) pair in stepArgsIter
+
+    workers: if None or 1, the steps are run one after another in the
+             current thread and the first error is raised as is.
+             Otherwise, the steps are run on a pool of that many threads.
+             (Each step is expected to spend most of its time waiting on
+             a subprocess, such as praat.)  Every step is attempted and, if
+             any of them fail, a ResynthesisException listing the failed
+             steps is raised at the end.
+
+    stepArgsIter is consumed lazily; with a pool, at most twice as many
+    steps as there are workers are pending at any time.
+
+    Returns the results of stepFunc, in the same order as stepArgsIter.
+    """
+    if workers is None or workers == 1:
+        return [stepFunc(*args) for _, args in stepArgsIter]
+
+    resultList = []
+    failedStepList = []
+    pendingList = []
+
+    def collectOldest():
+        stepName, future = pendingList.pop(0)
+        try:
+            resultList.append(future.result())
+        except Exception as e:
+            resultList.append(None)
+            failedStepList.append((stepName, e))
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for stepName, args in stepArgsIter:
+            pendingList.append((stepName, executor.submit(stepFunc, *args)))
+
+            if len(pendingList) >= 2 * workers:
+                collectOldest()
+
+        while len(pendingList) > 0:
+            collectOldest()
+
+    if len(failedStepList) > 0:
+        raise ResynthesisException(failedStepList) from failedStepList[0][1]
+
+    return resultList
+
+
+class ResynthesisBackend(object):
+    """
+    The interface implemented by all resynthesis backends
+
+    Each method receives the source wav and an iterable of
+    ResynthesisJob and must write the audio for each job to its
+    outputWavFN.  minPitch and maxPitch bound the pitch analysis of the
+    source wav.  Backends that do not need the tier files may skip writing
+    them.
+
+    Each method returns a list with one entry per job: the bytes of the
+    wav file for jobs whose outputWavFN is None, and None otherwise.
+
+    version identifies the output of a backend for CachingBackend; it
+    should be changed whenever the audio a backend produces changes.
+    """
+
+    version = "1"
+
+    def getCacheKey(self):
+        return "%s-%s" % (type(self).__name__, self.version)
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        raise NotImplementedError()
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        raise NotImplementedError()
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        """
+        Resynthesizes JointResynthesisJobs, changing pitch and duration at once
+        """
+        raise NotImplementedError()
+
+
+def _getDurationPointList(durationParameters):
+    """
+    Converts (start, end, ratio) duration parameters into duration tier points
+    """
+    durationPointList = []
+    for start, end, ratio in durationParameters:
+        durationPointList.append((start, ratio))
+        durationPointList.append((end, ratio))
+
+    return durationPointList
+
+
+def saveTier(job, tierType, wavDuration):
+    """
+    Saves the data of a job as a PitchTier or DurationTier in job.tierFN
+    """
+    dataList = job.dataList
+    if tierType == constants.DataPointTypes.DURATION:
+        dataList = _getDurationPointList(dataList)
+
+    pointObj = data_points.PointObject2D(dataList, tierType, 0, wavDuration)
+    pointObj.save(job.tierFN)
+
+
+def _saveNamedTiers(job, tierType, wavDuration):
+    """
+    Saves every tier of a job (joint or not) that has a file name
+    """
+    if tierType == PITCH_AND_DURATION:
+        _saveNamedTiers(job.pitchJob, constants.DataPointTypes.PITCH, wavDuration)
+        _saveNamedTiers(job.durationJob, constants.DataPointTypes.DURATION, wavDuration)
+    elif job.tierFN is not None:
+        saveTier(job, tierType, wavDuration)
+
+
+def _withoutData(job):
+    """
+    Drops the data of a job once its tiers have been saved
+    """
+    if isinstance(job, JointResynthesisJob):
+        return job._replace(
+            pitchJob=job.pitchJob._replace(dataList=None),
+            durationJob=job.durationJob._replace(dataList=None),
+        )
+
+    return job._replace(dataList=None)
+
+
+def _getTierFNList(job):
+    if isinstance(job, JointResynthesisJob):
+        return [job.pitchJob.tierFN, job.durationJob.tierFN]
+
+    return [job.tierFN]
+
+
+def _resynthesizeStep(
+    praatEXE,
+    resynthesizeFunc,
+    tierType,
+    fromWavFN,
+    wavDuration,
+    job,
+    minPitch,
+    maxPitch,
+):
+    """
+    Saves the tier for a single morph step and resynthesizes it
+    """
+    returnBytes = job.outputWavFN is None
+
+    tmpPath = None
+    if job.tierFN is None or returnBytes:
+        tmpPath = tempfile.mkdtemp()
+        job = _fillInTemporaryPaths(job, tmpPath)
+
+    try:
+        saveTier(job, tierType, wavDuration)
+
+        resynthesizeFunc(
+            praatEXE,
+            fromWavFN,
+            job.tierFN,
+            job.outputWavFN,
+            minPitch,
+            maxPitch,
+        )
+
+        wavBytes = None
+        if returnBytes:
+            wavBytes = _readBytes(job.outputWavFN)
+    finally:
+        if tmpPath is not None:
+            shutil.rmtree(tmpPath)
+
+    return wavBytes
+
+
+def _fillInTemporaryPaths(job, tmpPath, i=0):
+    """
+    Points any missing tier or wav file name of a job into tmpPath
+    """
+    if isinstance(job, JointResynthesisJob):
+        job = job._replace(
+            pitchJob=_fillInTemporaryPaths(job.pitchJob, tmpPath, "%d_pitch" % i),
+            durationJob=_fillInTemporaryPaths(
+                job.durationJob, tmpPath, "%d_duration" % i
+            ),
+        )
+    elif job.tierFN is None:
+        job = job._replace(tierFN=join(tmpPath, "step_%s.tier" % i))
+    if job.outputWavFN is None:
+        job = job._replace(outputWavFN=join(tmpPath, "step_%s.wav" % i))
+
+    return job
+
+
+def _readBytes(fn):
+    with io.open(fn, "rb") as fd:
+        return fd.read()
+
+
+class TierOnlyBackend(ResynthesisBackend):
+    """
+    Produces no audio; only saves the tier of each job that has a tierFN
+    """
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._saveTiers(constants.DataPointTypes.PITCH, fromWavFN, jobIter)
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._saveTiers(constants.DataPointTypes.DURATION, fromWavFN, jobIter)
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._saveTiers(PITCH_AND_DURATION, fromWavFN, jobIter)
+
+    def _saveTiers(self, tierType, fromWavFN, jobIter):
+        wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+
+        wavBytesList = []
+        for job in jobIter:
+            _saveNamedTiers(job, tierType, wavDuration)
+            wavBytesList.append(None)
+
+        return wavBytesList
+
+
+class PraatBackend(ResynthesisBackend):
+    """
+    Resynthesizes each step with its own praat process
+
+    workers: the number of steps to resynthesize in parallel
+             (see runSteps())
+    """
+
+    def __init__(self, praatEXE, workers=None):
+        self.praatEXE = praatEXE
+        self.workers = workers
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            praat_scripts.resynthesizePitch,
+            constants.DataPointTypes.PITCH,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            praat_scripts.resynthesizeDuration,
+            constants.DataPointTypes.DURATION,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def _resynthesize(
+        self, resynthesizeFunc, tierType, fromWavFN, jobIter, minPitch, maxPitch
+    ):
+        wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+
+        stepArgsIter = (
+            (
+                job.stepName,
+                (
+                    self.praatEXE,
+                    resynthesizeFunc,
+                    tierType,
+                    fromWavFN,
+                    wavDuration,
+                    job,
+                    minPitch,
+                    maxPitch,
+                ),
+            )
+            for job in jobIter
+        )
+        return runSteps(_resynthesizeStep, stepArgsIter, self.workers)
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        # Each step is run as a batch of one, so praat is still started
+        # once per step
+        batchedBackend = BatchedPraatBackend(self.praatEXE)
+
+        stepArgsIter = (
+            (job.stepName, (batchedBackend, fromWavFN, job, minPitch, maxPitch))
+            for job in jobIter
+        )
+        return runSteps(_resynthesizeJointStep, stepArgsIter, self.workers)
+
+
+def _resynthesizeJointStep(batchedBackend, fromWavFN, job, minPitch, maxPitch):
+    return batchedBackend.resynthesizePitchAndDuration(
+        fromWavFN, [job], minPitch, maxPitch
+    )[0]
+
+
+def _praatString(value):
+    """
+    Quotes a value for use as a string literal in a praat script
+    """
+    return '"%s"' % str(value).replace('"', '""')
+
+
+def _getBatchedScript(fromWavFN, jobList, replaceCommandList, minPitch, maxPitch):
+    """
+    Generates a praat script that resynthesizes every job in jobList
+
+    The source wav is read and converted into a Manipulation object once.
+    The script then loops over the steps, swapping each step's tiers into
+    the Manipulation (with the commands in replaceCommandList, one per
+    tier) and saving the resynthesized audio.
+    """
+    lineList = ["numSteps = %d" % len(jobList)]
+    for i, job in enumerate(jobList):
+        for j, tierFN in enumerate(_getTierFNList(job)):
+            lineList.append("tierFN%d$[%d] = %s" % (j + 1, i + 1, _praatString(tierFN)))
+        lineList.append(
+            "outputWavFN$[%d] = %s" % (i + 1, _praatString(job.outputWavFN))
+        )
+
+    lineList.extend(
+        [
+            "",
+            "sound = Read from file: %s" % _praatString(fromWavFN),
+            "manipulation = To Manipulation: 0.01, %s, %s" % (minPitch, maxPitch),
+            "",
+            "for i from 1 to numSteps",
+        ]
+    )
+    for j, replaceCommand in enumerate(replaceCommandList):
+        lineList.extend(
+            [
+                "    tier = Read from file: tierFN%d$[i]" % (j + 1),
+                "    plusObject: manipulation",
+                "    %s" % replaceCommand,
+                "    removeObject: tier",
+                "",
+            ]
+        )
+    lineList.extend(
+        [
+            "    selectObject: manipulation",
+            "    Get resynthesis (overlap-add)",
+            "    Save as WAV file: outputWavFN$[i]",
+            "    Remove",
+            "endfor",
+            "",
+            "selectObject: manipulation",
+            "plusObject: sound",
+            "Remove",
+            "",
+            "exitScript()",
+            "",
+        ]
+    )
+
+    return "\n".join(lineList)
+
+
+class BatchedPraatBackend(ResynthesisBackend):
+    """
+    Resynthesizes all steps of a morph with a single praat process
+
+    Launching praat and analyzing the source wav dominates the time it
+    takes to resynthesize a step.  This backend generates one praat script
+    that does both only once and then loops over the tiers of all steps.
+
+    scriptFN: if given, the generated script is saved there (and kept)
+              rather than in a temporary file
+    """
+
+    def __init__(self, praatEXE, scriptFN=None):
+        self.praatEXE = praatEXE
+        self.scriptFN = scriptFN
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            ["Replace pitch tier"],
+            constants.DataPointTypes.PITCH,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            ["Replace duration tier"],
+            constants.DataPointTypes.DURATION,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            ["Replace pitch tier", "Replace duration tier"],
+            PITCH_AND_DURATION,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def _resynthesize(
+        self, replaceCommandList, tierType, fromWavFN, jobIter, minPitch, maxPitch
+    ):
+        wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+
+        tmpPath = tempfile.mkdtemp()
+        try:
+            jobList = []
+            returnBytesList = []
+            for i, job in enumerate(jobIter):
+                returnBytesList.append(job.outputWavFN is None)
+                job = _fillInTemporaryPaths(job, tmpPath, i)
+
+                _saveNamedTiers(job, tierType, wavDuration)
+                jobList.append(_withoutData(job))
+
+            if len(jobList) == 0:
+                return []
+
+            # Only the tier files are needed by praat from here on
+            script = _getBatchedScript(
+                fromWavFN, jobList, replaceCommandList, minPitch, maxPitch
+            )
+
+            scriptFN = self.scriptFN
+            if scriptFN is None:
+                scriptFN = join(tmpPath, "resynthesize.praat")
+
+            with io.open(scriptFN, "w", encoding="utf-8") as fd:
+                fd.write(script)
+
+            praatio_utils.runPraatScript(self.praatEXE, scriptFN, [])
+
+            return [
+                _readBytes(job.outputWavFN) if returnBytes else None
+                for job, returnBytes in zip(jobList, returnBytesList)
+            ]
+        finally:
+            shutil.rmtree(tmpPath)
+
+
+class PsolaBackend(ResynthesisBackend):
+    """
+    Resynthesizes pitch or duration in-process using numpy TD-PSOLA
+
+    The source wav is read and its pitch marks found only once.  Each job's
+    pitch points or duration parameters are used directly from memory: no
+    subprocess is started and no tier file is written.
+    """
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            fromWavFN,
+            ((job, job.dataList, None) for job in jobIter),
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            fromWavFN,
+            ((job, None, job.dataList) for job in jobIter),
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            fromWavFN,
+            ((job, job.pitchJob.dataList, job.durationJob.dataList) for job in jobIter),
+            minPitch,
+            maxPitch,
+        )
+
+    def _resynthesize(self, fromWavFN, jobTierIter, minPitch, maxPitch):
+        # The source is only analyzed once there is a job to resynthesize
+        analysis = None
+
+        wavBytesList = []
+        for job, pitchList, durationParameters in jobTierIter:
+            if analysis is None:
+                analysis = self._analyze(fromWavFN, minPitch, maxPitch)
+            samples, sampleRate, markArray, voicedArray = analysis
+
+            timeMapping = None
+            if durationParameters is not None:
+                duration = samples.shape[0] / float(sampleRate)
+                sourceTimes, outputTimes = psola.getDurationMapping(
+                    durationParameters, duration
+                )
+                timeMapping = (sourceTimes * sampleRate, outputTimes * sampleRate)
+
+            outputSamples = psola.psola(
+                samples,
+                sampleRate,
+                markArray,
+                voicedArray,
+                pitchList=pitchList,
+                timeMapping=timeMapping,
+            )
+            wavBytesList.append(self._output(job, outputSamples, sampleRate))
+
+        return wavBytesList
+
+    def _output(self, job, outputSamples, sampleRate):
+        if job.outputWavFN is None:
+            return psola.getWavBytes(outputSamples, sampleRate)
+
+        psola.writeWav(job.outputWavFN, outputSamples, sampleRate)
+        return None
+
+    def _analyze(self, fromWavFN, minPitch, maxPitch):
+        samples, sampleRate = psola.readWav(fromWavFN)
+        markArray, voicedArray = psola.getPitchMarks(
+            samples, sampleRate, minPitch, maxPitch
+        )
+
+        return samples, sampleRate, markArray, voicedArray
+
+
+def _hashFile(fn):
+    hashObj = hashlib.sha1()
+    with io.open(fn, "rb") as fd:
+        for block in iter(lambda: fd.read(2**20), b""):
+            hashObj.update(block)
+
+    return hashObj.hexdigest()
+
+
+class CachingBackend(ResynthesisBackend):
+    """
+    Caches the outputs of another backend on disk
+
+    Outputs are stored in cachePath under a hash of the source wav's
+    contents, the job's tier data, the pitch range, and the wrapped
+    backend's cache key.  Jobs found in the cache are not passed on to the
+    wrapped backend; their wav file is copied from the cache (and their
+    tier saved, if the job has a tierFN).
+
+    maxSize: the maximum size of the cache, in bytes.  When it is exceeded,
+             the least recently used outputs are removed.  If None, the
+             cache is never pruned.
+    """
+
+    def __init__(self, backend, cachePath, maxSize=None):
+        self.backend = backend
+        self.cachePath = cachePath
+        self.maxSize = maxSize
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._wavHashDict = {}
+
+        if not os.path.exists(cachePath):
+            os.makedirs(cachePath)
+
+    def getCacheKey(self):
+        return self.backend.getCacheKey()
+
+    def getStats(self):
+        return CacheStats(self.hits, self.misses, self.evictions)
+
+    def clear(self):
+        for fn in os.listdir(self.cachePath):
+            if fn.endswith(".wav"):
+                os.remove(join(self.cachePath, fn))
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            self.backend.resynthesizePitch,
+            constants.DataPointTypes.PITCH,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizeDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            self.backend.resynthesizeDuration,
+            constants.DataPointTypes.DURATION,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def resynthesizePitchAndDuration(self, fromWavFN, jobIter, minPitch, maxPitch):
+        return self._resynthesize(
+            self.backend.resynthesizePitchAndDuration,
+            PITCH_AND_DURATION,
+            fromWavFN,
+            jobIter,
+            minPitch,
+            maxPitch,
+        )
+
+    def _resynthesize(
+        self, resynthesizeFunc, tierType, fromWavFN, jobIter, minPitch, maxPitch
+    ):
+        wavHash = self._getWavHash(fromWavFN)
+        wavDuration = audio_scripts.getSoundFileDuration(fromWavFN)
+
+        resultDict = {}
+        missList = []
+        duplicateList = []
+        pendingKeySet = set()
+
+        # Cache hits are served while the wrapped backend is consuming the
+        # misses, so jobIter is still only iterated over once
+        def missIter():
+            for i, job in enumerate(jobIter):
+                key = self._getKey(wavHash, tierType, job, minPitch, maxPitch)
+                cacheFN = join(self.cachePath, "%s.wav" % key)
+
+                if os.path.exists(cacheFN):
+                    self.hits += 1
+                    os.utime(cacheFN, None)
+                    _saveNamedTiers(job, tierType, wavDuration)
+                    resultDict[i] = self._copyOut(cacheFN, job.outputWavFN)
+                    continue
+
+                # The same output was already requested in this batch; it is
+                # resynthesized once and copied out to every job
+                if key in pendingKeySet:
+                    self.hits += 1
+                    _saveNamedTiers(job, tierType, wavDuration)
+                    duplicateList.append((i, job, cacheFN))
+                    continue
+
+                self.misses += 1
+                pendingKeySet.add(key)
+                tmpFN = "%s.%d.tmp" % (cacheFN, os.getpid())
+                missList.append((i, job, cacheFN, tmpFN))
+                yield job._replace(outputWavFN=tmpFN)
+
+        try:
+            resynthesizeFunc(fromWavFN, missIter(), minPitch, maxPitch)
+
+            for i, job, cacheFN, tmpFN in missList:
+                os.replace(tmpFN, cacheFN)
+                resultDict[i] = self._copyOut(cacheFN, job.outputWavFN)
+            for i, job, cacheFN in duplicateList:
+                resultDict[i] = self._copyOut(cacheFN, job.outputWavFN)
+        finally:
+            for _, _, _, tmpFN in missList:
+                if os.path.exists(tmpFN):
+                    os.remove(tmpFN)
+
+        if len(missList) > 0:
+            self._prune()
+
+        return [resultDict[i] for i in range(len(resultDict))]
+
+    def _getWavHash(self, fromWavFN):
+        stat = os.stat(fromWavFN)
+        statKey = (os.path.abspath(fromWavFN), stat.st_mtime, stat.st_size)
+        if statKey not in self._wavHashDict:
+            self._wavHashDict[statKey] = _hashFile(fromWavFN)
+
+        return self._wavHashDict[statKey]
+
+    def _getKey(self, wavHash, tierType, job, minPitch, maxPitch):
+        if tierType == PITCH_AND_DURATION:
+            dataList = [job.pitchJob.dataList, job.durationJob.dataList]
+        else:
+            dataList = [job.dataList]
+        dataList = [
+            [[float(value) for value in point] for point in subList]
+            for subList in dataList
+        ]
+        keyStr = repr(
+            (
+                wavHash,
+                tierType,
+                dataList,
+                float(minPitch),
+                float(maxPitch),
+                self.backend.getCacheKey(),
+            )
+        )
+        return hashlib.sha1(keyStr.encode("utf-8")).hexdigest()
+
+    def _copyOut(self, cacheFN, outputWavFN):
+        if outputWavFN is None:
+            return _readBytes(cacheFN)
+
+        shutil.copyfile(cacheFN, outputWavFN)
+        return None
+
+    def _prune(self):
+        if self.maxSize is None:
+            return
+
+        entryList = []
+        for fn in os.listdir(self.cachePath):
+            if fn.endswith(".wav"):
+                stat = os.stat(join(self.cachePath, fn))
+                entryList.append((stat.st_mtime, stat.st_size, fn))
+
+        # Remove the least recently used outputs first
+        entryList.sort()
+        totalSize = sum(size for _, size, _ in entryList)
+        for _, size, fn in entryList:
+            if totalSize <= self.maxSize:
+                break
+            os.remove(join(self.cachePath, fn))
+            totalSize -= size
+            self.evictions += 1
@@ -0,0 +1,223 @@
+"""
+Created on Oct 18, 2026
+
+@author: timmahrt
+
+A mapping from the times of a source recording to the times of a
+duration-manipulated version of it.
+
+Duration manipulations are described by a list of (start, end, ratio)
+duration parameters: the region between start and end is stretched by
+ratio and everything else is left alone.  The resulting mapping from
+source time to output time is piecewise-linear and, for positive ratios,
+monotone, so it can be stored as two lists of breakpoints and evaluated
+with a binary search.
+"""
+
+import bisect
+
+try:
+    import numpy as np
+except ImportError:
+    hasNumpy = False
+else:
+    hasNumpy = True
+
+
+def _interpolate(xList, yList, x):
+    """
+    Evaluates the piecewise-linear function through (xList, yList) at x
+
+    Outside of the breakpoints, the function continues with a slope of 1.
+    """
+    if len(xList) == 0:
+        return x
+
+    i = bisect.bisect_right(xList, x)
+    if i == 0:
+        return yList[0] + (x - xList[0])
+    if i == len(xList):
+        return yList[-1] + (x - xList[-1])
+
+    x0, x1 = xList[i - 1], xList[i]
+    y0, y1 = yList[i - 1], yList[i]
+
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+def _interpolateArray(xArray, yArray, timeArray):
+    if xArray.shape[0] == 0:
+        return timeArray.copy()
+
+    outputArray = np.interp(timeArray, xArray, yArray)
+    outputArray += np.minimum(timeArray - xArray[0], 0)
+    outputArray += np.maximum(timeArray - xArray[-1], 0)
+
+    return outputArray
+
+
+class TimeWarp(object):
+    """
+    Maps source times to the times after a duration manipulation
+
+    durationParameters: a list of non-overlapping (start, end, ratio)
+                        tuples, as returned by
+                        duration_morph.getMorphParameters()
+    stepFactor: how much of the manipulation to apply; each ratio becomes
+                1 + (ratio - 1) * stepFactor, as in changeDuration()
+
+    The breakpoints are kept in sourceTimes and outputTimes.
+    """
+
+    def __init__(self, durationParameters, stepFactor=1.0):
+        self.sourceTimes = []
+        self.outputTimes = []
+
+        shift = 0
+        for start, end, ratio in sorted(durationParameters):
+            stepRatio = 1 + (ratio - 1) * stepFactor
+
+            self.sourceTimes.append(start)
+            self.outputTimes.append(start + shift)
+
+            shift += (stepRatio - 1) * (end - start)
+
+            self.sourceTimes.append(end)
+            self.outputTimes.append(end + shift)
+
+        self._sourceArray = None
+        self._outputArray = None
+
+    @classmethod
+    def fromDurationTier(cls, durationParameters, duration):
+        """
+        Returns the warp that resynthesis with a praat DurationTier applies
+
+        Each (start, end, ratio) tuple adds a point with ratio at start and
+        at end.  The ratio is interpolated linearly between points (also
+        across the gaps between parameters) and held constant before the
+        first and after the last point, up to the edges of the source
+        (0 and duration).  The breakpoints are the same as those of
+        psola.getDurationMapping().
+        """
+        pointList = []
+        for start, end, ratio in durationParameters:
+            pointList.append((start, ratio))
+            pointList.append((end, ratio))
+        pointList.sort(key=lambda point: point[0])
+
+        if pointList[0][0] > 0:
+            pointList.insert(0, (0.0, pointList[0][1]))
+        if pointList[-1][0] < duration:
+            pointList.append((duration, pointList[-1][1]))
+
+        timeWarp = cls([])
+        outputTime = 0.0
+        for i, (time, ratio) in enumerate(pointList):
+            if i > 0:
+                lastTime, lastRatio = pointList[i - 1]
+                outputTime += (time - lastTime) * (lastRatio + ratio) / 2.0
+            timeWarp.sourceTimes.append(time)
+            timeWarp.outputTimes.append(outputTime)
+
+        return timeWarp
+
+    def mapTime(self, time):
+        """
+        Returns the output time of a source time
+        """
+        return _interpolate(self.sourceTimes, self.outputTimes, time)
+
+    def invertTime(self, time):
+        """
+        Returns the source time of an output time
+        """
+        return _interpolate(self.outputTimes, self.sourceTimes, time)
+
+    def mapTimes(self, timeList):
+        """
+        Returns the output times of a list or array of source times
+
+        With numpy, the times are mapped in a single vectorized call.  An
+        array is returned for an array and a list otherwise.
+        """
+        if not hasNumpy:
+            return [self.mapTime(time) for time in timeList]
+
+        sourceArray, outputArray = self._getArrays()
+        return self._mapArray(sourceArray, outputArray, timeList)
+
+    def invertTimes(self, timeList):
+        """
+        Returns the source times of a list or array of output times
+        """
+        if not hasNumpy:
+            return [self.invertTime(time) for time in timeList]
+
+        sourceArray, outputArray = self._getArrays()
+        return self._mapArray(outputArray, sourceArray, timeList)
+
+    def mapTimesForSteps(self, timeList, stepFactorList):
+        """
+        Returns the output times of timeList for several step factors
+
+        The shift of every time grows linearly with the step factor, so the
+        shifts are found once and scaled for each step.  Step factors are
+        relative to this warp (for a warp with the default stepFactor of 1,
+        step s gives the times of TimeWarp(durationParameters, s)).
+
+        Returns one row of times per step factor, as a 2-D array if
+        timeList is an array and as a list of lists otherwise.
+        """
+        if not hasNumpy:
+            shiftList = [
+                newTime - time
+                for time, newTime in zip(timeList, self.mapTimes(timeList))
+            ]
+            return [
+                [time + stepFactor * shift for time, shift in zip(timeList, shiftList)]
+                for stepFactor in stepFactorList
+            ]
+
+        timeArray = np.asarray(timeList, dtype=np.float64)
+        shiftArray = self.mapTimes(timeArray) - timeArray
+        stepArray = np.asarray(stepFactorList, dtype=np.float64)
+
+        outputMatrix = timeArray[np.newaxis, :] + (
+            stepArray[:, np.newaxis] * shiftArray[np.newaxis, :]
+        )
+        if isinstance(timeList, np.ndarray):
+            return outputMatrix
+
+        return outputMatrix.tolist()
+
+    def retime(self, dataList):
+        """
+        Moves data of the form [(time1, value1), ...] to the output times
+
+        e.g. to align a pitch track of the source with audio that was
+        resynthesized from a DurationTier (for that, the warp must come
+        from fromDurationTier())
+        """
+        if len(dataList) == 0:
+            return []
+
+        timeList, valueList = zip(*dataList)
+
+        return list(zip(self.mapTimes(list(timeList)), valueList))
+
+    def _mapArray(self, xArray, yArray, timeList):
+        outputArray = _interpolateArray(
+            xArray, yArray, np.asarray(timeList, dtype=np.float64)
+        )
+        if isinstance(timeList, np.ndarray):
+            return outputArray
+
+        return outputArray.tolist()
+
+    def _getArrays(self):
+        if self._sourceArray is None:
+            self._sourceArray = np.array(self.sourceTimes, dtype=np.float64)
+            self._outputArray = np.array(self.outputTimes, dtype=np.float64)
+
+        return self._sourceArray, self._outputArray
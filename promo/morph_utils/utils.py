@@ -5,16 +5,78 @@ Created on Apr 2, 2015
 """
 
 import os
+import threading
+from collections import OrderedDict, namedtuple
 
 from praatio import textgrid
 
+# The counters reported by the getStats() method of a cache
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions"])
+
+# The maximum number of parsed textgrids kept by openTextgrid()
+TEXTGRID_CACHE_SIZE = 128
+
+_textgridCache = OrderedDict()
+_textgridCacheLock = threading.Lock()
+
+
+def openTextgrid(fn, includeEmptyIntervals=False):
+    """
+    Opens a textgrid, reusing an earlier parse of the same file if possible
+
+    Parsed textgrids are kept in a process-wide LRU cache keyed by the
+    file's path, modification time and size, and includeEmptyIntervals,
+    so a file that changes on disk is parsed again.  The returned textgrid
+    is shared by all callers and must not be modified (use tg.new() to get
+    a copy that can be).
+    """
+    fn = os.path.abspath(fn)
+    stat = os.stat(fn)
+    key = (fn, includeEmptyIntervals, stat.st_mtime_ns, stat.st_size)
+
+    with _textgridCacheLock:
+        if key in _textgridCache:
+            _textgridCache.move_to_end(key)
+            return _textgridCache[key]
+
+    tg = textgrid.openTextgrid(fn, includeEmptyIntervals=includeEmptyIntervals)
+
+    with _textgridCacheLock:
+        # Drop any parse of an older version of the file
+        for oldKey in list(_textgridCache.keys()):
+            if oldKey[:2] == key[:2]:
+                del _textgridCache[oldKey]
+
+        _textgridCache[key] = tg
+        while len(_textgridCache) > TEXTGRID_CACHE_SIZE:
+            _textgridCache.popitem(last=False)
+
+    return tg
+
+
+def invalidateTextgridCache(fn=None):
+    """
+    Removes fn from the cache used by openTextgrid()
+
+    If fn is None, the whole cache is cleared.
+    """
+    with _textgridCacheLock:
+        if fn is None:
+            _textgridCache.clear()
+            return
+
+        fn = os.path.abspath(fn)
+        for key in list(_textgridCache.keys()):
+            if key[0] == fn:
+                del _textgridCache[key]
+
 
 def getIntervals(fn, tierName, filterFunc=None, includeUnlabeledRegions=False):
     """
     Get information about the 'extract' tier, used by several merge scripts
     """
 
-    tg = textgrid.openTextgrid(fn, includeEmptyIntervals=includeUnlabeledRegions)
+    tg = openTextgrid(fn, includeEmptyIntervals=includeUnlabeledRegions)
 
     tier = tg.getTier(tierName)
 
@@ -26,8 +88,8 @@ def getIntervals(fn, tierName, filterFunc=None, includeUnlabeledRegions=False):
 
 
 def makeDir(path):
-    if not os.path.exists(path):
-        os.mkdir(path)
+    # Safe to call from several processes at once
+    os.makedirs(path, exist_ok=True)
 
 
 def generateStepList(numSteps, includeZero=False):
@@ -0,0 +1,188 @@
+"""
+Unit tests for promo.batch_morph
+"""
+
+import io
+import os
+from os.path import join
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from promo import batch_morph
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+# Stands in for praat; each call takes a little time, so jobs with more
+# steps take longer.  Pitch extraction copies <wav>.pitch to the requested
+# file and is logged to <praat>.log.
+STUB_PRAAT = """#!%s
+import os
+import shutil
+import sys
+import time
+
+time.sleep(0.05)
+if sys.argv[2].endswith("get_pitch_and_intensity.praat"):
+    with open(sys.argv[0] + ".log", "a") as fd:
+        fd.write(sys.argv[3] + "\\n")
+    shutil.copy(os.path.splitext(sys.argv[3])[0] + ".pitch", sys.argv[4])
+"""
+
+MANIFEST = """morphType,fromWav,toWav,fromTG,toTG,tierName,steps,outputPath
+f0,mary1.wav,mary2.wav,mary1.TextGrid,mary2.TextGrid,words,0.5;1.0,f0_output
+duration,mary1.wav,mary2.wav,mary1.TextGrid,mary2.TextGrid,words,2,
+"""
+
+
+class TestBatchMorph(unittest.TestCase):
+    """Tests for running morphs from a manifest"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.outputPath = tempfile.mkdtemp()
+        for fn in ["mary1", "mary2"]:
+            for ext in [".wav", ".TextGrid", ".txt"]:
+                shutil.copy(join(_root, fn + ext), self.outputPath)
+
+        self.praatEXE = join(self.outputPath, "praat")
+        with io.open(self.praatEXE, "w", encoding="utf-8") as fd:
+            fd.write(STUB_PRAAT % sys.executable)
+        os.chmod(self.praatEXE, os.stat(self.praatEXE).st_mode | stat.S_IEXEC)
+
+        self.manifestFN = join(self.outputPath, "manifest.csv")
+        with io.open(self.manifestFN, "w", encoding="utf-8") as fd:
+            fd.write(MANIFEST)
+
+    def tearDown(self):
+        shutil.rmtree(self.outputPath)
+
+    def test_loadManifest(self):
+        f0Job, durationJob = batch_morph.loadManifest(self.manifestFN)
+
+        self.assertEqual("mary1_mary2_f0_morph", f0Job.outputName)
+        self.assertEqual([0.5, 1.0], f0Job.stepList)
+        self.assertEqual(join(self.outputPath, "f0_output"), f0Job.outputPath)
+        self.assertEqual(join(self.outputPath, "mary1.wav"), durationJob.fromWavFN)
+        self.assertEqual([0.5, 1.0], durationJob.stepList)
+        self.assertEqual(350, durationJob.maxPitch)
+
+    def _runBatch(self, jobList, checkpointFN):
+        batchReport = batch_morph.runBatch(jobList, self.praatEXE, checkpointFN)
+        return [jobReport.outputName for jobReport in batchReport.jobReportList]
+
+    def test_resume(self):
+        jobList = batch_morph.loadManifest(self.manifestFN)
+        checkpointFN = join(self.outputPath, "manifest.csv.done")
+
+        self.assertEqual(
+            ["mary1_mary2_f0_morph"], self._runBatch(jobList[:1], checkpointFN)
+        )
+        self.assertTrue(
+            os.path.exists(
+                join(
+                    self.outputPath,
+                    "f0_output",
+                    "pitchTiers",
+                    "mary1_mary2_f0_morph_1.PitchTier",
+                )
+            )
+        )
+
+        # Only the unfinished job is run after an interruption
+        self.assertEqual(
+            ["mary1_mary2_duration_morph"], self._runBatch(jobList, checkpointFN)
+        )
+        self.assertEqual([], self._runBatch(jobList, checkpointFN))
+
+        # A job whose settings change is run again
+        changedJob = jobList[1]._replace(stepList=[1.0])
+        self.assertEqual(
+            ["mary1_mary2_duration_morph"], self._runBatch([changedJob], checkpointFN)
+        )
+
+    def test_pooled_jobs_share_folders(self):
+        # The pitch files have yet to be extracted
+        for fn in ["mary1", "mary2"]:
+            os.rename(
+                join(self.outputPath, fn + ".txt"), join(self.outputPath, fn + ".pitch")
+            )
+
+        f0Job, durationJob = batch_morph.loadManifest(self.manifestFN)
+        jobList = [f0Job._replace(outputName="f0_%d" % i) for i in range(4)] + [
+            durationJob._replace(outputName="duration_%d" % i) for i in range(2)
+        ]
+        checkpointFN = join(self.outputPath, "manifest.csv.done")
+
+        batch_morph.runBatch(jobList, self.praatEXE, checkpointFN, workers=3)
+
+        # Every job wrote into the shared folders and was recorded
+        for i in range(4):
+            self.assertTrue(
+                os.path.exists(
+                    join(
+                        self.outputPath,
+                        "f0_output",
+                        "pitchTiers",
+                        "f0_%d_1.PitchTier" % i,
+                    )
+                )
+            )
+        self.assertEqual(
+            set(batch_morph.getJobKey(job) for job in jobList),
+            batch_morph.loadCheckpoint(checkpointFN),
+        )
+        self.assertEqual([], self._runBatch(jobList, checkpointFN))
+
+        # The pitch of each wav was extracted only once
+        with io.open(self.praatEXE + ".log", "r", encoding="utf-8") as fd:
+            extractedList = fd.read().split()
+        self.assertEqual(
+            sorted(join(self.outputPath, fn) for fn in ["mary1.wav", "mary2.wav"]),
+            sorted(extractedList),
+        )
+
+    def test_predictions_use_earlier_runs(self):
+        jobList = batch_morph.loadManifest(self.manifestFN)
+        checkpointFN = join(self.outputPath, "manifest.csv.done")
+
+        # With no earlier jobs, nothing can be predicted
+        batchReport = batch_morph.runBatch(jobList[:1], self.praatEXE, checkpointFN)
+        self.assertIsNone(batchReport.predictedMakespan)
+        self.assertIsNone(batchReport.jobReportList[0].predictedTime)
+
+        # Later runs are predicted at the rate of the earlier ones
+        firstReport = batchReport.jobReportList[0]
+        batchReport = batch_morph.runBatch(jobList, self.praatEXE, checkpointFN)
+        jobReport = batchReport.jobReportList[0]
+        self.assertAlmostEqual(
+            firstReport.actualTime / firstReport.cost * jobReport.cost,
+            jobReport.predictedTime,
+        )
+
+    def test_scheduleJobs(self):
+        job = batch_morph.loadManifest(self.manifestFN)[0]
+        duration = batch_morph.estimateJobCost(job._replace(stepList=[1.0]))
+
+        jobList = [
+            job._replace(outputName=str(numSteps), stepList=[1.0] * numSteps)
+            for numSteps in [1, 5, 2, 3, 3]
+        ]
+        scheduledJobList, workerLoadList = batch_morph.scheduleJobs(jobList, 2)
+
+        # Longest first; the loads assume each job goes to the least
+        # loaded worker: 5 + 2 and 3 + 3 + 1
+        self.assertEqual(
+            ["5", "3", "3", "2", "1"],
+            [sj.job.outputName for sj in scheduledJobList],
+        )
+        self.assertAlmostEqual(7 * duration, workerLoadList[0])
+        self.assertAlmostEqual(7 * duration, workerLoadList[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for promo.duration_morph
+"""
+
+import os
+from os.path import join
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from promo import duration_morph
+from promo.morph_utils import utils
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+
+class TestOutputMorphTextgrids(unittest.TestCase):
+    """Tests for saving a retimed textgrid for every step"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.outputPath = tempfile.mkdtemp()
+        self.fromTGFN = join(_root, "mary1.TextGrid")
+        self.durationParameters = duration_morph.getMorphParameters(
+            self.fromTGFN, join(_root, "mary2.TextGrid"), "phones"
+        )
+        self.stepList = [0.25, 0.5, 1.0]
+
+    def tearDown(self):
+        shutil.rmtree(self.outputPath)
+
+    def _checkSteps(self, workers):
+        outputTGName = join(self.outputPath, "tgs_%d" % workers, "mary1")
+        duration_morph.outputMorphTextgrids(
+            self.fromTGFN,
+            self.durationParameters,
+            self.stepList,
+            outputTGName,
+            workers=workers,
+        )
+
+        for stepFactor in self.stepList:
+            # Each step matches the textgrid retimed for that step alone
+            stepDurationParameters = [
+                (start, end, 1 + (ratio - 1) * stepFactor)
+                for start, end, ratio in self.durationParameters
+            ]
+            expectedTG = duration_morph.textgridManipulateDuration(
+                self.fromTGFN, stepDurationParameters
+            )
+            tg = utils.openTextgrid(
+                "%s_%0.3g.TextGrid" % (outputTGName, stepFactor),
+                includeEmptyIntervals=False,
+            )
+
+            self.assertEqual(expectedTG.tierNames, tg.tierNames)
+            for tierName in tg.tierNames:
+                expectedTier = expectedTG.getTier(tierName)
+                tier = tg.getTier(tierName)
+                self.assertAlmostEqual(expectedTier.maxTimestamp, tier.maxTimestamp)
+                self.assertEqual(len(expectedTier.entries), len(tier.entries))
+                for expectedEntry, entry in zip(expectedTier.entries, tier.entries):
+                    self.assertEqual(expectedEntry.label, entry.label)
+                    self.assertAlmostEqual(expectedEntry.start, entry.start)
+                    self.assertAlmostEqual(expectedEntry.end, entry.end)
+
+    def test_serial(self):
+        self._checkSteps(1)
+
+    def test_pooled(self):
+        self._checkSteps(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+"""
+Unit tests for promo.f0_morph
+"""
+
+import os
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from promo import f0_morph
+from promo.morph_utils import utils
+from promo.morph_utils.pitch_contour import PitchContour
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+
+class TestNonMorphRegions(unittest.TestCase):
+    """Tests for extracting and merging back the unmorphed source regions"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.sourceList = [(i / 10.0, 100 + i) for i in range(20)]
+
+    def test_getValuesInIntervals(self):
+        timeList = [time for time, _ in self.sourceList]
+
+        blockList = f0_morph._getValuesInIntervals(
+            self.sourceList, timeList, [(0.0, 0.25), (0.5, 0.7), (1.05, 1.08)]
+        )
+
+        self.assertEqual(
+            [self.sourceList[0:3], self.sourceList[5:8], []],
+            blockList,
+        )
+
+    def test_mergeSortedBlocks(self):
+        morphedList = [(0.3, 90), (0.4, 95), (0.7, 80), (0.9, 85)]
+        blockList = [
+            self.sourceList[0:4],
+            self.sourceList[5:8],
+            [],
+            self.sourceList[15:],
+        ]
+
+        expectedList = morphedList[:]
+        for block in blockList:
+            expectedList.extend(block)
+        expectedList.sort()
+
+        self.assertEqual(
+            expectedList, f0_morph._mergeSortedBlocks(morphedList, blockList)
+        )
+
+    def test_unsorted_source(self):
+        fromPitchData = [[(0.45, 100), (0.65, 110)], [(1.25, 90), (1.45, 95)]]
+        toPitchData = [[(0.45, 150), (0.65, 160)], [(1.25, 140), (1.45, 145)]]
+        shuffledList = self.sourceList[10:] + self.sourceList[:10]
+
+        stepList = list(
+            f0_morph.iterPitchMorphSteps(
+                fromPitchData,
+                toPitchData,
+                [1.0],
+                sourcePitchDataList=shuffledList,
+                minIntervalLength=0.05,
+            )
+        )
+
+        # The gap between the two regions is filled from the source
+        self.assertEqual(
+            toPitchData[0] + self.sourceList[7:13] + toPitchData[1],
+            stepList[0][1],
+        )
+
+
+class TestGetPitchForIntervals(unittest.TestCase):
+    """Tests for bucketing pitch points by interval"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.tgFN = os.path.join(_root, "mary1.TextGrid")
+        self.pitchList = [(i * 0.01, 100.0 + i % 7) for i in range(115)]
+
+    def test_matches_praatio(self):
+        tier = utils.openTextgrid(self.tgFN).getTier("phones")
+        expectedList = [
+            dataList for _, dataList in tier.getValuesInIntervals(self.pitchList)
+        ]
+
+        self.assertEqual(
+            expectedList,
+            f0_morph.getPitchForIntervals(self.pitchList, self.tgFN, "phones"),
+        )
+
+    def test_asContours(self):
+        contourList = f0_morph.getPitchForIntervals(
+            self.pitchList, self.tgFN, "words", asContours=True
+        )
+
+        self.assertEqual(
+            f0_morph.getPitchForIntervals(self.pitchList, self.tgFN, "words"),
+            [contour.toList() for contour in contourList],
+        )
+
+        # Every contour shares the memory of the first
+        self.assertIs(contourList[0].times.base, contourList[-1].times.base)
+
+
+class TestF0MorphToTargets(unittest.TestCase):
+    """Tests for morphing one source toward several targets"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.fromWavFN = os.path.join(_root, "mary1.wav")
+        self.fromPitchData = [
+            [(i * 0.01, 100.0 + i % 7) for i in range(50)],
+            [(0.6 + i * 0.01, 120.0 - i % 5) for i in range(40)],
+        ]
+        self.toPitchDataList = [
+            [
+                [(i * 0.02, 180.0 + i % 3) for i in range(30)],
+                [(0.7 + i * 0.02, 200.0 - i % 4) for i in range(20)],
+            ],
+            [
+                [(i * 0.015, 90.0 + i % 9) for i in range(40)],
+                [(0.65 + i * 0.01, 95.0 + i % 2) for i in range(30)],
+            ],
+        ]
+
+    def test_matches_f0Morph(self):
+        kwargs = dict(
+            keepPitchRange=True,
+            keepAveragePitch=True,
+            inMemory=True,
+            includeAudio=False,
+        )
+        resultListList = f0_morph.f0MorphToTargets(
+            self.fromWavFN,
+            None,
+            [0.5, 1.0],
+            ["a", "b"],
+            False,
+            self.fromPitchData,
+            self.toPitchDataList,
+            50,
+            350,
+            None,
+            **kwargs,
+        )
+
+        self.assertEqual(2, len(resultListList))
+        for toPitchData, resultList in zip(self.toPitchDataList, resultListList):
+            expectedList = f0_morph.f0Morph(
+                self.fromWavFN,
+                None,
+                [0.5, 1.0],
+                "a",
+                False,
+                self.fromPitchData,
+                toPitchData,
+                50,
+                350,
+                None,
+                **kwargs,
+            )
+            self.assertEqual(expectedList, resultList)
+
+
+class TestPitchContourSteps(unittest.TestCase):
+    """Tests for morphing PitchContour data without converting it to lists"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.fromWavFN = os.path.join(_root, "mary1.wav")
+        self.fromPitchData = [
+            [(0.1 + i * 0.01, 100.0 + i % 7) for i in range(30)],
+            [(0.6 + i * 0.01, 120.0 - i % 5) for i in range(40)],
+        ]
+        self.toPitchData = [
+            [(i * 0.02, 180.0 + i % 3) for i in range(30)],
+            [(0.7 + i * 0.02, 200.0 - i % 4) for i in range(20)],
+        ]
+        self.sourcePitchDataList = [(i * 0.01, 110.0 + i % 3) for i in range(150)]
+        self.kwargs = dict(
+            keepPitchRange=True,
+            keepAveragePitch=True,
+            sourcePitchDataList=self.sourcePitchDataList,
+            minIntervalLength=0.05,
+        )
+
+    def test_steps_stay_contours(self):
+        expectedIter = f0_morph.iterPitchMorphSteps(
+            self.fromPitchData, self.toPitchData, [0.5, 1.0], **self.kwargs
+        )
+        stepIter = f0_morph.iterPitchMorphSteps(
+            [PitchContour.fromList(dataList) for dataList in self.fromPitchData],
+            [PitchContour.fromList(dataList) for dataList in self.toPitchData],
+            [0.5, 1.0],
+            **self.kwargs,
+        )
+
+        for (expectedStep, expectedList), (step, contour) in zip(
+            expectedIter, stepIter
+        ):
+            self.assertEqual(expectedStep, step)
+            self.assertIsInstance(contour, PitchContour)
+            np.testing.assert_allclose(
+                np.array(expectedList), contour.toArray(), rtol=0, atol=1e-9
+            )
+
+    def test_f0Morph_returns_lists(self):
+        resultList = f0_morph.f0Morph(
+            self.fromWavFN,
+            None,
+            [1.0],
+            "a",
+            False,
+            [PitchContour.fromList(dataList) for dataList in self.fromPitchData],
+            [PitchContour.fromList(dataList) for dataList in self.toPitchData],
+            50,
+            350,
+            None,
+            inMemory=True,
+            includeAudio=False,
+            **self.kwargs,
+        )
+
+        self.assertIsInstance(resultList[0].dataList, list)
+
+
+if __name__ == "__main__":
+    unittest.main()
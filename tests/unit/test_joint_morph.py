@@ -0,0 +1,141 @@
+"""
+Unit tests for promo.joint_morph
+"""
+
+import io
+from os.path import join
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from promo import joint_morph
+from promo.morph_utils import psola
+from promo.morph_utils import resynthesis
+from tests.unit.test_psola import _getHarmonicTone, _getMedianPitch
+
+
+class TestJointMorph(unittest.TestCase):
+    """Tests for morphing the pitch and the duration in one resynthesis"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.sampleRate = 16000
+        self.outputPath = tempfile.mkdtemp()
+        self.fromWavFN = join(self.outputPath, "tone.wav")
+        psola.writeWav(
+            self.fromWavFN, _getHarmonicTone(120, self.sampleRate), self.sampleRate
+        )
+
+        self.fromPitchData = [[(0, 120), (0.5, 120), (1.0, 120)]]
+        self.toPitchData = [[(0, 150), (0.5, 150), (1.0, 150)]]
+        self.durationParameters = [(0, 1.0, 2.0)]
+
+    def tearDown(self):
+        shutil.rmtree(self.outputPath)
+
+    def test_pitchAndDurationMorphInMemory(self):
+        resultList = joint_morph.pitchAndDurationMorph(
+            self.fromWavFN,
+            self.outputPath,
+            [1.0],
+            "tone",
+            self.fromPitchData,
+            self.toPitchData,
+            self.durationParameters,
+            75,
+            400,
+            None,
+            backend=resynthesis.PsolaBackend(),
+            inMemory=True,
+        )
+
+        # The pitch and the duration were changed in one pass
+        result = resultList[0]
+        outputSamples, sampleRate = psola.readWav(io.BytesIO(result.wavBytes))
+        self.assertAlmostEqual(2 * self.sampleRate, outputSamples.shape[0], delta=2)
+        self.assertAlmostEqual(150, _getMedianPitch(outputSamples, sampleRate), delta=5)
+
+        # The returned pitch data is in the time of the new wav
+        self.assertAlmostEqual(2.0, result.dataList[-1][0])
+
+    def test_pitchAndDurationMorphGrid(self):
+        resultList = joint_morph.pitchAndDurationMorphGrid(
+            self.fromWavFN,
+            self.outputPath,
+            [0, 1.0],
+            [0, 0.5, 1.0],
+            "tone",
+            self.fromPitchData,
+            self.toPitchData,
+            self.durationParameters,
+            75,
+            400,
+            None,
+            backend=resynthesis.PsolaBackend(),
+            inMemory=True,
+        )
+
+        # The cell that is identical to the source is skipped
+        self.assertEqual(
+            [(0, 0.5), (0, 1.0), (1.0, 0), (1.0, 0.5), (1.0, 1.0)],
+            [result.stepAmount for result in resultList],
+        )
+        for result in resultList:
+            pitchStep, durationStep = result.stepAmount
+            outputSamples, sampleRate = psola.readWav(io.BytesIO(result.wavBytes))
+            self.assertAlmostEqual(
+                (1 + durationStep) * self.sampleRate,
+                outputSamples.shape[0],
+                delta=2,
+            )
+            self.assertAlmostEqual(
+                120 + 30 * pitchStep,
+                _getMedianPitch(outputSamples, sampleRate),
+                delta=5,
+            )
+
+    def test_pitch_times_match_the_audio(self):
+        # The pitch jumps from 120 Hz to 200 Hz at 0.7s in the source
+        samples = np.concatenate(
+            [
+                _getHarmonicTone(120, self.sampleRate, 0.7),
+                _getHarmonicTone(200, self.sampleRate, 0.3),
+            ]
+        )
+        psola.writeWav(self.fromWavFN, samples, self.sampleRate)
+        pitchData = [[(0.1, 120), (0.69, 120), (0.71, 200), (0.95, 200)]]
+
+        # The ratio is interpolated from 2 to 0.5 across the gap between
+        # 0.4s and 0.6s, so the jump lands at 1.0s (not at 0.95s)
+        resultList = joint_morph.pitchAndDurationMorph(
+            self.fromWavFN,
+            self.outputPath,
+            [1.0],
+            "tone",
+            pitchData,
+            pitchData,
+            [(0.1, 0.4, 2.0), (0.6, 0.9, 0.5)],
+            75,
+            400,
+            None,
+            backend=resynthesis.PsolaBackend(),
+            inMemory=True,
+        )
+
+        result = resultList[0]
+        outputSamples, sampleRate = psola.readWav(io.BytesIO(result.wavBytes))
+        timeArray, pitchArray, voicedArray = psola.estimatePitch(
+            outputSamples, sampleRate, 75, 400
+        )
+        jumpTime = timeArray[voicedArray & (pitchArray > 160)][0] / sampleRate
+
+        jumpStart, jumpEnd = result.dataList[1][0], result.dataList[2][0]
+        self.assertAlmostEqual(1.0, (jumpStart + jumpEnd) / 2.0, delta=0.002)
+        self.assertAlmostEqual(jumpTime, (jumpStart + jumpEnd) / 2.0, delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,435 @@
+"""
+Unit tests for promo.morph_utils.morph_sequence
+"""
+
+import unittest
+
+import numpy as np
+
+from promo.morph_utils import morph_sequence
+
+
+class TestMorphSequence(unittest.TestCase):
+    """Tests for the morph engine"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.fromList = [(0.1, 100), (0.2, 120), (0.35, 150), (0.5, 110), (0.6, 90)]
+        self.toList = [(1.0, 200), (1.1, 220), (1.3, 180), (1.5, 160)]
+        self.stepList = [0, 0.25, 0.5, 1.0]
+
+    def test_morphDataMatrix_shape(self):
+        timeMatrix, valueMatrix = morph_sequence.morphDataMatrix(
+            self.fromList, self.toList, self.stepList
+        )
+
+        self.assertEqual((4, 5), timeMatrix.shape)
+        self.assertEqual((4, 5), valueMatrix.shape)
+
+        # A step of 0 leaves the source untouched
+        self.assertEqual([row[0] for row in self.fromList], timeMatrix[0].tolist())
+        self.assertEqual([row[1] for row in self.fromList], valueMatrix[0].tolist())
+
+    def test_morphDataLists_matches_pure_python(self):
+        vectorized = list(
+            morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+        )
+
+        morph_sequence.hasNumpy = False
+        try:
+            purePython = list(
+                morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+            )
+        finally:
+            morph_sequence.hasNumpy = True
+
+        self.assertEqual(purePython, vectorized)
+
+    def test_getNearestMappingIndexList(self):
+        fromValList = [0, 0.1, 0.5, 0.9]
+        toValList = [0, 0.1, 0.2, 1]
+
+        self.assertEqual(
+            [0, 1, 2, 3],
+            morph_sequence._getNearestMappingIndexList(fromValList, toValList),
+        )
+        self.assertEqual(
+            [0, 1, 2, 3],
+            morph_sequence._getNearestMappingIndexArray(
+                np.array(fromValList, dtype=float), np.array(toValList, dtype=float)
+            ).tolist(),
+        )
+
+    def test_getNearestMappingIndexList_ties(self):
+        # Equidistant values resolve to the later value and repeated
+        # values resolve to their first occurrence
+        fromValList = [0.25, 0.75, 2]
+        toValList = [0, 0.5, 0.5, 1, 1]
+
+        self.assertEqual(
+            [1, 3, 3],
+            morph_sequence._getNearestMappingIndexList(fromValList, toValList),
+        )
+        self.assertEqual(
+            [1, 3, 3],
+            morph_sequence._getNearestMappingIndexArray(
+                np.array(fromValList, dtype=float), np.array(toValList, dtype=float)
+            ).tolist(),
+        )
+
+    def test_getNearestMappingIndexList_repeated_values(self):
+        # A run of repeated values does not hide a closer value next to it
+        fromValList = [0, 0.1, 0.5, 1]
+        toValList = [0, 0.5, 0.5, 0.5, 1]
+
+        self.assertEqual(
+            [0, 0, 1, 4],
+            morph_sequence._getNearestMappingIndexList(fromValList, toValList),
+        )
+        self.assertEqual(
+            [0, 0, 1, 4],
+            morph_sequence._getNearestMappingIndexArray(
+                np.array(fromValList, dtype=float), np.array(toValList, dtype=float)
+            ).tolist(),
+        )
+
+    def test_morphRange_repeated_values(self):
+        fromDataList = [(0.1, 100), (0.2, 100), (0.3, 150), (0.4, 200)]
+        toDataList = [(0.1, 80), (0.2, 120), (0.3, 120), (0.4, 120), (0.5, 160)]
+
+        # The lowest pitch maps to the lowest target pitch
+        self.assertEqual(
+            [(0.1, 80), (0.2, 80), (0.3, 120), (0.4, 160)],
+            morph_sequence.morphRange(fromDataList, toDataList),
+        )
+
+    def test_iterMorphChunkedDataLists(self):
+        fromDataList = [self.fromList, [(1.0, 100)], [(2.0, 90), (2.1, 95)]]
+        toDataList = [self.toList, [(2.0, 100), (2.1, 90)], [(3.0, 80), (3.2, 85)]]
+
+        stepIter = morph_sequence.iterMorphChunkedDataLists(
+            fromDataList, toDataList, self.stepList
+        )
+        streamed = list(stepIter)
+
+        # Each step joins the steps of every region morphed on its own; the
+        # region with a single point is skipped
+        expectedList = [
+            (stepAmount, firstList + lastList)
+            for (stepAmount, firstList), (_, lastList) in zip(
+                morph_sequence.morphDataLists(
+                    self.fromList, self.toList, self.stepList
+                ),
+                morph_sequence.morphDataLists(
+                    fromDataList[2], toDataList[2], self.stepList
+                ),
+            )
+        ]
+        self.assertEqual(expectedList, streamed)
+
+        self.assertEqual([(2.0, 87.5), (2.1, 92.5)], streamed[1][1][-2:])
+        self.assertEqual([(2.0, 80.0), (2.1, 85.0)], streamed[3][1][-2:])
+
+    def test_iterMorphChunkedDataLists_no_data(self):
+        with self.assertRaises(IndexError):
+            morph_sequence.iterMorphChunkedDataLists(
+                [[(1.0, 100)]], [[(2.0, 100)]], self.stepList
+            )
+
+    def test_morphRange(self):
+        fromList = [(0.1, 100), (0.2, 150), (0.3, 100), (0.4, 200)]
+        toList = [(0.1, 80), (0.2, 90), (0.3, 120), (0.4, 300)]
+
+        self.assertEqual(
+            [(0.1, 80), (0.2, 120), (0.3, 80), (0.4, 300)],
+            morph_sequence.morphRange(fromList, toList),
+        )
+
+    def test_morphRange_interpolated(self):
+        fromList = [(0.1, 100), (0.2, 150), (0.3, 100), (0.4, 200)]
+        toList = [(0.1, 80), (0.2, 90), (0.3, 120), (0.4, 300)]
+
+        # Ranks 0 and 1 are shared by the two 100s, so both take the
+        # average rank 0.5, at quantile 0.5 / 3; the target quantiles are
+        # 0, 1/3, 2/3 and 1, so that falls halfway between 80 and 90
+        self.assertEqual(
+            [(0.1, 85), (0.2, 120), (0.3, 85), (0.4, 300)],
+            morph_sequence.morphRange(fromList, toList, interpolate=True),
+        )
+
+    def test_morphRange_interpolated_ties(self):
+        # Half of the values are 100, as with quantized pitch
+        fromList = [(i * 0.1, pitch) for i, pitch in enumerate([100] * 5 + [200] * 4)]
+        fromList.append((1.0, 300))
+        toList = [(i * 0.1, 50 + 10 * i) for i in range(11)]
+
+        # Of ten values, the 100s hold ranks 0 to 4 (average 2), the 200s
+        # ranks 5 to 8 (average 6.5) and 300 rank 9.  The eleven target
+        # values sit at quantiles 0, 0.1, ..., 1.
+        quantileDict = {100: 2 / 9.0, 200: 6.5 / 9.0, 300: 1.0}
+        expectedList = [
+            (time, 50 + 100 * quantileDict[pitch]) for time, pitch in fromList
+        ]
+
+        outputList = morph_sequence.morphRange(fromList, toList, interpolate=True)
+        for (time, pitch), (outputTime, outputPitch) in zip(expectedList, outputList):
+            self.assertEqual(time, outputTime)
+            self.assertAlmostEqual(pitch, outputPitch)
+
+
+class TestMultipleValueColumns(unittest.TestCase):
+    """Tests for morphing several values per point at once"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        # (time, pitch, intensity) rows
+        self.fromList = [
+            (0.1, 100, 60),
+            (0.2, 120, 65),
+            (0.35, 150, 70),
+            (0.5, 110, 62),
+            (0.6, 90, 55),
+        ]
+        self.toList = [(1.0, 200, 70), (1.1, 220, 72), (1.3, 180, 68), (1.5, 160, 50)]
+        self.stepList = [0, 0.25, 0.5, 1.0]
+
+    def _getColumn(self, dataList, i):
+        return [(row[0], row[i]) for row in dataList]
+
+    def test_columns_morph_as_if_separate(self):
+        outputList = list(
+            morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+        )
+
+        for i in [1, 2]:
+            self.assertEqual(
+                list(
+                    morph_sequence.morphDataLists(
+                        self._getColumn(self.fromList, i),
+                        self._getColumn(self.toList, i),
+                        self.stepList,
+                    )
+                ),
+                [
+                    (stepAmount, self._getColumn(dataList, i))
+                    for stepAmount, dataList in outputList
+                ],
+            )
+
+    def test_array_input(self):
+        timeMatrix, valueMatrix = morph_sequence.morphDataMatrix(
+            np.array(self.fromList), np.array(self.toList), self.stepList
+        )
+
+        self.assertEqual((4, 5), timeMatrix.shape)
+        self.assertEqual((4, 5, 2), valueMatrix.shape)
+        self.assertEqual(
+            [list(row[1:]) for row in self.fromList], valueMatrix[0].tolist()
+        )
+
+    def test_matches_pure_python(self):
+        vectorized = list(
+            morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+        )
+
+        morph_sequence.hasNumpy = False
+        try:
+            purePython = list(
+                morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+            )
+        finally:
+            morph_sequence.hasNumpy = True
+
+        self.assertEqual(purePython, vectorized)
+
+
+class TestDtwAlignment(unittest.TestCase):
+    """Tests for aligning events with dynamic time warping"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        # A single peak, early in the source and late in the target
+        fromTimes = np.linspace(0, 1, 101)
+        toTimes = np.linspace(0, 2, 81)
+        self.fromList = list(
+            zip(fromTimes, 100 + 50 * np.exp(-(((fromTimes - 0.3) / 0.05) ** 2)))
+        )
+        self.toList = list(
+            zip(toTimes, 150 + 50 * np.exp(-(((toTimes - 0.76) / 0.1) ** 2)))
+        )
+
+    def test_peaks_are_aligned(self):
+        timeMatrix, valueMatrix = morph_sequence.morphDataMatrix(
+            self.fromList, self.toList, [0.5], alignment="dtw"
+        )
+
+        # Halfway through, there is a single peak, halfway between the two
+        # (in relative time)
+        peakI = np.argmax(valueMatrix[0])
+        self.assertAlmostEqual(0.34, timeMatrix[0][peakI], delta=0.01)
+        self.assertAlmostEqual(175, valueMatrix[0][peakI], delta=1)
+
+        # With relative alignment, each peak is blended with the flat part
+        # of the other contour, so neither reaches its full height
+        valueMatrix = morph_sequence.morphDataMatrix(self.fromList, self.toList, [0.5])[
+            1
+        ]
+        self.assertLess(valueMatrix[0].max(), 165)
+
+    def test_matches_full_dtw(self):
+        # With a band covering everything, the result matches a plain DTW
+        # that keeps every backpointer (ties resolved the same way)
+        rng = np.random.default_rng(0)
+        fromValues = rng.random(30)
+        toValues = rng.random(23)
+
+        fromZ = morph_sequence._zScore(fromValues)
+        toZ = morph_sequence._zScore(toValues)
+        costMatrix = np.full((31, 24), np.inf)
+        costMatrix[0, 0] = 0
+        backpointerMatrix = np.zeros((30, 23), dtype=int)
+        for i in range(30):
+            for j in range(23):
+                local = abs(fromZ[i] - toZ[j])
+                fromBelow = min(costMatrix[i, j], costMatrix[i, j + 1])
+                backpointerMatrix[i, j] = (
+                    1 if costMatrix[i, j + 1] < costMatrix[i, j] else 0
+                )
+                if costMatrix[i + 1, j] + local < local + fromBelow:
+                    backpointerMatrix[i, j] = 2
+                    costMatrix[i + 1, j + 1] = costMatrix[i + 1, j] + local
+                else:
+                    costMatrix[i + 1, j + 1] = local + fromBelow
+
+        pathList = [[] for _ in range(30)]
+        i, j = 29, 22
+        pathList[i].append(j)
+        while i > 0 or j > 0:
+            backpointer = backpointerMatrix[i, j]
+            if backpointer != 2:
+                i -= 1
+            if backpointer != 1:
+                j -= 1
+            pathList[i].append(j)
+
+        self.assertEqual(
+            [(min(path) + max(path)) // 2 for path in pathList],
+            morph_sequence._getDtwIndexArray(
+                np.linspace(0, 1, 30), fromValues, np.linspace(0, 1, 23), toValues, 1.0
+            ).tolist(),
+        )
+
+    def test_unknown_alignment(self):
+        with self.assertRaises(morph_sequence.UnknownAlignmentException):
+            morph_sequence.morphChunkedDataLists(
+                [self.fromList], [self.toList], [0.5], alignment="nearest"
+            )
+
+
+class TestMorphPlan(unittest.TestCase):
+    """Tests for taking morph steps on demand"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.fromList = [(0.1, 100), (0.2, 120), (0.35, 150), (0.5, 110), (0.6, 90)]
+        self.toList = [(1.0, 200), (1.1, 220), (1.3, 180), (1.5, 160)]
+        self.stepList = [0, 0.25, 0.5, 1.0]
+
+    def test_matches_morphDataLists(self):
+        plan = morph_sequence.MorphPlan(self.fromList, self.toList)
+
+        self.assertEqual(
+            list(
+                morph_sequence.morphDataLists(self.fromList, self.toList, self.stepList)
+            ),
+            list(plan.iterSteps(self.stepList)),
+        )
+        self.assertEqual(
+            next(morph_sequence.morphDataLists(self.fromList, self.toList, [0.6]))[1],
+            plan.at(0.6),
+        )
+
+    def test_aligns_once(self):
+        cache = morph_sequence.AlignmentCache()
+        plan = morph_sequence.MorphPlan(
+            self.fromList, self.toList, alignmentCache=cache
+        )
+
+        for stepAmount in [0.1, 0.9, 0.3]:
+            plan.at(stepAmount)
+
+        self.assertEqual((0, 1, 0), cache.getStats())
+
+
+class TestAlignmentCache(unittest.TestCase):
+    """Tests for reusing alignments between morphs"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.fromList = [(0.1, 100), (0.2, 120), (0.35, 150), (0.5, 110), (0.6, 90)]
+        self.toList = [(1.0, 200), (1.1, 220), (1.3, 180), (1.5, 160)]
+
+    def test_repeated_morph_hits_cache(self):
+        cache = morph_sequence.AlignmentCache()
+
+        for stepList in [[0.5, 1.0], [0.25, 0.75]]:
+            self.assertEqual(
+                list(
+                    morph_sequence.morphDataLists(self.fromList, self.toList, stepList)
+                ),
+                list(
+                    morph_sequence.morphDataLists(
+                        self.fromList, self.toList, stepList, cache
+                    )
+                ),
+            )
+
+        self.assertEqual((1, 1, 0), cache.getStats())
+
+        # Stretching the target in time doesn't change its relative times
+        stretchedList = [(time * 2, value) for time, value in self.toList]
+        list(morph_sequence.morphDataLists(self.fromList, stretchedList, [1.0], cache))
+        self.assertEqual(2, cache.hits)
+
+    def test_pure_python_path(self):
+        cache = morph_sequence.AlignmentCache()
+
+        morph_sequence.hasNumpy = False
+        try:
+            for _ in range(2):
+                list(
+                    morph_sequence.morphDataLists(
+                        self.fromList, self.toList, [1.0], cache
+                    )
+                )
+        finally:
+            morph_sequence.hasNumpy = True
+
+        self.assertEqual((1, 1, 0), cache.getStats())
+
+    def test_lru_eviction(self):
+        cache = morph_sequence.AlignmentCache(maxSize=2)
+
+        toListList = [
+            self.toList,
+            self.toList[:3],
+            self.toList[1:],
+        ]
+        for toList in toListList + toListList[:1]:
+            list(morph_sequence.morphDataLists(self.fromList, toList, [1.0], cache))
+
+        # The first alignment was evicted before it was needed again
+        self.assertEqual((0, 4, 2), cache.getStats())
+
+        cache.clear()
+        list(morph_sequence.morphDataLists(self.fromList, self.toList, [1.0], cache))
+        self.assertEqual(5, cache.misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
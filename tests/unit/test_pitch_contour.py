@@ -0,0 +1,90 @@
+"""
+Unit tests for promo.morph_utils.pitch_contour
+"""
+
+import unittest
+
+import numpy as np
+
+from promo.morph_utils import morph_sequence
+from promo.morph_utils import interpolation
+from promo.morph_utils import modify_pitch_accent
+from promo.morph_utils.pitch_contour import PitchContour
+
+
+class TestPitchContour(unittest.TestCase):
+    """Tests for PitchContour"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.dataList = [(0.1, 100), (0.2, 120), (0.35, 150), (0.5, 110), (0.6, 90)]
+        self.contour = PitchContour.fromList(self.dataList)
+
+    def test_list_round_trip(self):
+        self.assertEqual(5, len(self.contour))
+        self.assertEqual(self.dataList, self.contour.toList())
+        self.assertEqual(self.dataList, list(self.contour))
+        self.assertEqual((0.35, 150), self.contour[2])
+
+    def test_getValuesInInterval_is_a_view(self):
+        subContour = self.contour.getValuesInInterval(0.2, 0.5)
+
+        self.assertEqual([(0.2, 120), (0.35, 150), (0.5, 110)], subContour.toList())
+        self.assertTrue(np.shares_memory(subContour.times, self.contour.times))
+        self.assertTrue(np.shares_memory(subContour.values, self.contour.values))
+
+    def test_merge(self):
+        blockList = [[(0.0, 80), (0.05, 85)], PitchContour.fromList([(0.35, 140)])]
+
+        self.assertEqual(
+            sorted(self.dataList + [(0.0, 80), (0.05, 85), (0.35, 140)]),
+            self.contour.merge(blockList).toList(),
+        )
+
+    def test_morphDataLists(self):
+        toList = [(1.0, 200), (1.1, 220), (1.3, 180), (1.5, 160)]
+        toContour = PitchContour.fromList(toList)
+        stepList = [0.5, 1.0]
+
+        listOutput = list(
+            morph_sequence.morphDataLists(self.dataList, toList, stepList)
+        )
+        contourOutput = list(
+            morph_sequence.morphDataLists(self.contour, toContour, stepList)
+        )
+
+        for (_, stepList), (_, stepContour) in zip(listOutput, contourOutput):
+            self.assertIsInstance(stepContour, PitchContour)
+            self.assertEqual(stepList, stepContour.toList())
+
+    def test_morphRange(self):
+        toList = [(1.0, 200), (1.1, 220), (1.3, 180), (1.5, 160), (1.6, 190)]
+
+        for interpolate in [False, True]:
+            listOutput = morph_sequence.morphRange(
+                self.dataList, toList, interpolate=interpolate
+            )
+            contourOutput = morph_sequence.morphRange(
+                self.contour, PitchContour.fromList(toList), interpolate=interpolate
+            )
+
+            self.assertIsInstance(contourOutput, PitchContour)
+            self.assertEqual(listOutput, contourOutput.toList())
+
+    def test_quadraticInterpolation(self):
+        listOutput = interpolation.quadraticInterpolation(self.dataList, 2, 10)
+        contourOutput = interpolation.quadraticInterpolation(self.contour, 2, 10)
+
+        self.assertIsInstance(contourOutput, PitchContour)
+        np.testing.assert_allclose(np.array(listOutput), contourOutput.toArray())
+
+    def test_pitchAccent(self):
+        accent = modify_pitch_accent.PitchAccent(self.contour)
+        accent.shiftAccent(0.1)
+
+        self.assertEqual(0.2, accent.pointList[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
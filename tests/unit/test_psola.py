@@ -0,0 +1,140 @@
+"""
+Unit tests for promo.morph_utils.psola
+"""
+
+import io
+import os
+from os.path import join
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from promo import duration_morph
+from promo.morph_utils import psola
+from promo.morph_utils import resynthesis
+
+
+def _getHarmonicTone(f0, sampleRate=16000, duration=1.0):
+    timeArray = np.arange(int(sampleRate * duration)) / float(sampleRate)
+    harmonicList = [np.sin(2 * np.pi * f0 * k * timeArray) / k for k in range(1, 8)]
+    return 0.3 * np.sum(harmonicList, axis=0)
+
+
+def _getMedianPitch(samples, sampleRate):
+    _, pitchArray, voicedArray = psola.estimatePitch(samples, sampleRate, 75, 400)
+    return np.median(pitchArray[voicedArray])
+
+
+class TestPsola(unittest.TestCase):
+    """Tests for numpy TD-PSOLA resynthesis"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.sampleRate = 16000
+        self.samples = _getHarmonicTone(120, self.sampleRate)
+
+    def test_estimatePitch(self):
+        self.assertAlmostEqual(
+            120, _getMedianPitch(self.samples, self.sampleRate), delta=2
+        )
+
+    def test_resynthesizePitch(self):
+        for targetPitch in [90, 150, 200]:
+            outputSamples = psola.resynthesizePitch(
+                self.samples,
+                self.sampleRate,
+                [(0, targetPitch), (1.0, targetPitch)],
+                75,
+                400,
+            )
+
+            self.assertEqual(self.samples.shape, outputSamples.shape)
+            self.assertAlmostEqual(
+                targetPitch,
+                _getMedianPitch(outputSamples, self.sampleRate),
+                delta=targetPitch * 0.03,
+            )
+
+    def test_resynthesizeDuration(self):
+        durationParameters = [(0, 0.5, 1.0), (0.500001, 1.0, 2.0)]
+        outputSamples = psola.resynthesizeDuration(
+            self.samples, self.sampleRate, durationParameters, 75, 400
+        )
+
+        # The second half is twice as long and the pitch is unchanged
+        self.assertAlmostEqual(1.5 * self.sampleRate, outputSamples.shape[0], delta=1)
+        self.assertAlmostEqual(
+            120, _getMedianPitch(outputSamples, self.sampleRate), delta=2
+        )
+
+    def test_getDurationMapping(self):
+        sourceTimes, outputTimes = psola.getDurationMapping(
+            [(0, 0.2, 1), (0.2, 0.5, 1.5), (0.5, 1.0, 1)], 1.0
+        )
+
+        np.testing.assert_allclose(
+            [0, 0.2, 0.65, 1.15],
+            np.interp([0, 0.2, 0.5, 1.0], sourceTimes, outputTimes),
+        )
+
+    def test_psolaBackend(self):
+        outputPath = tempfile.mkdtemp()
+        try:
+            fromWavFN = join(outputPath, "tone.wav")
+            psola.writeWav(fromWavFN, self.samples, self.sampleRate)
+
+            job = resynthesis.ResynthesisJob(
+                "tone_1",
+                [(0, 150), (1.0, 150)],
+                join(outputPath, "tone_1.PitchTier"),
+                join(outputPath, "tone_1.wav"),
+            )
+            resynthesis.PsolaBackend().resynthesizePitch(fromWavFN, [job], 75, 400)
+
+            # No tier file is needed
+            self.assertFalse(os.path.exists(job.tierFN))
+
+            outputSamples, sampleRate = psola.readWav(job.outputWavFN)
+            self.assertEqual(self.sampleRate, sampleRate)
+            self.assertAlmostEqual(
+                150, _getMedianPitch(outputSamples, sampleRate), delta=4
+            )
+        finally:
+            shutil.rmtree(outputPath)
+
+    def test_changeDurationInMemory(self):
+        outputPath = tempfile.mkdtemp()
+        try:
+            fromWavFN = join(outputPath, "tone.wav")
+            psola.writeWav(fromWavFN, self.samples, self.sampleRate)
+
+            resultList = duration_morph.changeDuration(
+                fromWavFN,
+                [(0, 1.0, 2.0)],
+                [0.5, 1.0],
+                "tone",
+                75,
+                400,
+                None,
+                backend=resynthesis.PsolaBackend(),
+                inMemory=True,
+            )
+
+            # Nothing was written to disk
+            self.assertEqual(["tone.wav"], os.listdir(outputPath))
+
+            self.assertEqual([0.5, 1.0], [result.stepAmount for result in resultList])
+            for result, ratio in zip(resultList, [1.5, 2.0]):
+                outputSamples, sampleRate = psola.readWav(io.BytesIO(result.wavBytes))
+                self.assertAlmostEqual(
+                    ratio * self.sampleRate, outputSamples.shape[0], delta=1
+                )
+        finally:
+            shutil.rmtree(outputPath)
+
+
+if __name__ == "__main__":
+    unittest.main()
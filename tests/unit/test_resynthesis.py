@@ -0,0 +1,267 @@
+"""
+Unit tests for promo.morph_utils.resynthesis
+"""
+
+import io
+import os
+from os.path import join
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from promo.morph_utils import resynthesis
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+# Stands in for praat: records the script it was asked to run
+STUB_PRAAT = """#!%s
+import shutil
+import sys
+
+shutil.copy(sys.argv[2], sys.argv[0] + ".praat")
+"""
+
+
+def _slowSquare(value):
+    # Later steps finish first
+    time.sleep(0.01 * (5 - value))
+    if value == 3:
+        raise ValueError("Step failed")
+    return value * value
+
+
+class TestRunSteps(unittest.TestCase):
+    """Tests for running steps serially or in parallel"""
+
+    def test_results_are_in_order(self):
+        stepArgsIter = (("step_%d" % i, (i,)) for i in [0, 1, 2, 4])
+
+        self.assertEqual(
+            [0, 1, 4, 16],
+            resynthesis.runSteps(_slowSquare, stepArgsIter, workers=4),
+        )
+
+    def test_failures_are_reported(self):
+        stepArgsIter = (("step_%d" % i, (i,)) for i in range(5))
+
+        with self.assertRaises(resynthesis.ResynthesisException) as cm:
+            resynthesis.runSteps(_slowSquare, stepArgsIter, workers=2)
+
+        self.assertEqual(["step_3"], [name for name, _ in cm.exception.failedStepList])
+
+    def test_serial_raises_original_error(self):
+        stepArgsIter = (("step_%d" % i, (i,)) for i in range(5))
+
+        with self.assertRaises(ValueError):
+            resynthesis.runSteps(_slowSquare, stepArgsIter)
+
+
+class TestBatchedPraatBackend(unittest.TestCase):
+    """Tests for resynthesizing every step with a single praat call"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.outputPath = tempfile.mkdtemp()
+        self.praatEXE = join(self.outputPath, "praat")
+        with io.open(self.praatEXE, "w", encoding="utf-8") as fd:
+            fd.write(STUB_PRAAT % sys.executable)
+        os.chmod(self.praatEXE, os.stat(self.praatEXE).st_mode | stat.S_IEXEC)
+
+        self.fromWavFN = join(_root, "mary1.wav")
+
+    def tearDown(self):
+        shutil.rmtree(self.outputPath)
+
+    def _getRecordedScript(self):
+        with io.open(self.praatEXE + ".praat", "r", encoding="utf-8") as fd:
+            return fd.read()
+
+    def test_resynthesizePitch(self):
+        jobList = [
+            resynthesis.ResynthesisJob(
+                "step_%d" % i,
+                [(0.1, 100 + i), (0.5, 120 + i)],
+                join(self.outputPath, "step_%d.PitchTier" % i),
+                join(self.outputPath, "step_%d.wav" % i),
+            )
+            for i in range(3)
+        ]
+
+        backend = resynthesis.BatchedPraatBackend(self.praatEXE)
+        backend.resynthesizePitch(self.fromWavFN, iter(jobList), 50, 350)
+
+        script = self._getRecordedScript()
+
+        # The source is loaded and analyzed only once
+        self.assertEqual(1, script.count('Read from file: "%s"' % self.fromWavFN))
+        self.assertEqual(1, script.count("To Manipulation: 0.01, 50, 350"))
+        self.assertIn("numSteps = 3", script)
+        self.assertIn("Replace pitch tier", script)
+
+        for job in jobList:
+            self.assertIn('"%s"' % job.outputWavFN, script)
+            self.assertTrue(os.path.exists(job.tierFN))
+
+    def test_resynthesizeDuration(self):
+        jobList = [
+            resynthesis.ResynthesisJob(
+                "step_1",
+                [(0, 0.5, 1.0), (0.500001, 1.1, 1.5)],
+                join(self.outputPath, "step_1.DurationTier"),
+                join(self.outputPath, "step_1.wav"),
+            )
+        ]
+
+        backend = resynthesis.BatchedPraatBackend(self.praatEXE)
+        backend.resynthesizeDuration(self.fromWavFN, jobList, 50, 350)
+
+        self.assertIn("Replace duration tier", self._getRecordedScript())
+        self.assertTrue(os.path.exists(jobList[0].tierFN))
+
+    def test_resynthesizePitchAndDuration(self):
+        pitchJob = resynthesis.ResynthesisJob(
+            "step_1",
+            [(0.1, 100), (0.5, 120)],
+            join(self.outputPath, "step_1.PitchTier"),
+            None,
+        )
+        durationJob = resynthesis.ResynthesisJob(
+            "step_1",
+            [(0, 0.5, 1.0), (0.500001, 1.1, 1.5)],
+            join(self.outputPath, "step_1.DurationTier"),
+            None,
+        )
+        job = resynthesis.JointResynthesisJob(
+            "step_1", pitchJob, durationJob, join(self.outputPath, "step_1.wav")
+        )
+
+        backend = resynthesis.BatchedPraatBackend(self.praatEXE)
+        backend.resynthesizePitchAndDuration(self.fromWavFN, [job], 50, 350)
+
+        # Both tiers are applied before a single resynthesis
+        script = self._getRecordedScript()
+        self.assertIn("Replace pitch tier", script)
+        self.assertIn("Replace duration tier", script)
+        self.assertEqual(1, script.count("Get resynthesis (overlap-add)"))
+        self.assertTrue(os.path.exists(pitchJob.tierFN))
+        self.assertTrue(os.path.exists(durationJob.tierFN))
+
+
+class _CountingBackend(resynthesis.ResynthesisBackend):
+    # Writes each job's data as its "audio" and counts the jobs it receives
+    def __init__(self):
+        self.numJobs = 0
+
+    def resynthesizePitch(self, fromWavFN, jobIter, minPitch, maxPitch):
+        for job in jobIter:
+            self.numJobs += 1
+            with io.open(job.outputWavFN, "wb") as fd:
+                fd.write(repr(job.dataList).encode("utf-8") * 100)
+        return []
+
+
+class TestCachingBackend(unittest.TestCase):
+    """Tests for caching resynthesized outputs on disk"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.outputPath = tempfile.mkdtemp()
+        self.cachePath = join(self.outputPath, "cache")
+        self.fromWavFN = join(_root, "mary1.wav")
+
+    def tearDown(self):
+        shutil.rmtree(self.outputPath)
+
+    def _getJobList(self, pitchList):
+        return [
+            resynthesis.ResynthesisJob(
+                "step_%d" % pitch,
+                [(0.1, pitch), (0.5, pitch)],
+                None,
+                join(self.outputPath, "step_%d.wav" % pitch),
+            )
+            for pitch in pitchList
+        ]
+
+    def test_hits_skip_resynthesis(self):
+        countingBackend = _CountingBackend()
+        backend = resynthesis.CachingBackend(countingBackend, self.cachePath)
+
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([100, 110]), 50, 350)
+        os.remove(join(self.outputPath, "step_100.wav"))
+
+        wavBytesList = backend.resynthesizePitch(
+            self.fromWavFN, self._getJobList([100, 120]), 50, 350
+        )
+        self.assertEqual(3, countingBackend.numJobs)
+        self.assertEqual((1, 3, 0), backend.getStats())
+        self.assertEqual([None, None], wavBytesList)
+        self.assertTrue(os.path.exists(join(self.outputPath, "step_100.wav")))
+
+        # A different pitch range is a different output
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([100]), 50, 400)
+        self.assertEqual(4, countingBackend.numJobs)
+
+        # In-memory jobs are served from the cache too
+        job = self._getJobList([110])[0]._replace(outputWavFN=None)
+        wavBytesList = backend.resynthesizePitch(self.fromWavFN, [job], 50, 350)
+        with io.open(join(self.outputPath, "step_110.wav"), "rb") as fd:
+            self.assertEqual([fd.read()], wavBytesList)
+
+    def test_repeated_job_in_batch(self):
+        countingBackend = _CountingBackend()
+        backend = resynthesis.CachingBackend(countingBackend, self.cachePath)
+
+        # Two jobs in one batch with the same output (e.g. step 0 of two
+        # targets) are resynthesized once
+        jobList = self._getJobList([100, 100])
+        jobList[1] = jobList[1]._replace(
+            outputWavFN=join(self.outputPath, "other_step_100.wav")
+        )
+        backend.resynthesizePitch(self.fromWavFN, jobList, 50, 350)
+
+        self.assertEqual(1, countingBackend.numJobs)
+        self.assertEqual((1, 1, 0), backend.getStats())
+        for job in jobList:
+            self.assertTrue(os.path.exists(job.outputWavFN))
+
+    def test_hits_skip_analysis(self):
+        psolaBackend = resynthesis.PsolaBackend()
+        backend = resynthesis.CachingBackend(psolaBackend, self.cachePath)
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([100]), 50, 350)
+
+        def analyze(*args):
+            raise AssertionError("The source was analyzed")
+
+        psolaBackend._analyze = analyze
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([100]), 50, 350)
+        self.assertEqual((1, 1, 0), backend.getStats())
+
+    def test_lru_eviction(self):
+        countingBackend = _CountingBackend()
+        backend = resynthesis.CachingBackend(
+            countingBackend, self.cachePath, maxSize=5000
+        )
+
+        for pitch in [100, 110, 100, 120, 130]:
+            backend.resynthesizePitch(
+                self.fromWavFN, self._getJobList([pitch]), 50, 350
+            )
+            time.sleep(0.01)
+
+        # Each output is 2400 bytes so only two fit; 110 is evicted first
+        self.assertEqual(2, backend.getStats().evictions)
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([130]), 50, 350)
+        self.assertEqual(4, countingBackend.numJobs)
+        backend.resynthesizePitch(self.fromWavFN, self._getJobList([110]), 50, 350)
+        self.assertEqual(5, countingBackend.numJobs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for promo.morph_utils.time_warp
+"""
+
+import os
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from promo import duration_morph
+from promo.morph_utils import psola
+from promo.morph_utils import utils
+from promo.morph_utils.time_warp import TimeWarp
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+
+class TestTimeWarp(unittest.TestCase):
+    """Tests for mapping times through a duration manipulation"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        # 0.2-0.4 doubles in length, 0.6-1.0 halves
+        self.timeWarp = TimeWarp([(0.2, 0.4, 2.0), (0.6, 1.0, 0.5)])
+
+    def test_mapTime(self):
+        for time, outputTime in [
+            (0.1, 0.1),
+            (0.3, 0.4),
+            (0.4, 0.6),
+            (0.5, 0.7),
+            (0.8, 0.9),
+            (1.0, 1.0),
+            (1.5, 1.5),
+        ]:
+            self.assertAlmostEqual(outputTime, self.timeWarp.mapTime(time))
+            self.assertAlmostEqual(time, self.timeWarp.invertTime(outputTime))
+
+    def test_fromDurationTier(self):
+        durationParameters = [(0.2, 0.4, 2.0), (0.6, 1.0, 0.5)]
+        timeWarp = TimeWarp.fromDurationTier(durationParameters, 1.5)
+
+        # The ratio falls from 2 to 0.5 between 0.4 and 0.6 and is held at
+        # 2 before 0.2 and at 0.5 after 1.0
+        for time, outputTime in [
+            (0.2, 0.4),
+            (0.4, 0.8),
+            (0.6, 1.05),
+            (1.0, 1.25),
+            (1.5, 1.5),
+        ]:
+            self.assertAlmostEqual(outputTime, timeWarp.mapTime(time))
+
+        sourceArray, outputArray = psola.getDurationMapping(durationParameters, 1.5)
+        np.testing.assert_allclose(sourceArray, timeWarp.sourceTimes)
+        np.testing.assert_allclose(outputArray, timeWarp.outputTimes)
+
+    def test_mapTimes(self):
+        timeArray = np.linspace(-0.5, 1.5, 101)
+        outputArray = self.timeWarp.mapTimes(timeArray)
+
+        np.testing.assert_allclose(
+            [self.timeWarp.mapTime(time) for time in timeArray], outputArray
+        )
+        np.testing.assert_allclose(timeArray, self.timeWarp.invertTimes(outputArray))
+        self.assertEqual(list, type(self.timeWarp.mapTimes([0.3])))
+
+    def test_stepFactor(self):
+        timeWarp = TimeWarp([(0.2, 0.4, 2.0)], stepFactor=0.5)
+
+        self.assertAlmostEqual(0.5, timeWarp.mapTime(0.4))
+        self.assertEqual(
+            [(0.1, 100), (0.5, 120)], timeWarp.retime([(0.1, 100), (0.4, 120)])
+        )
+
+    def test_mapTimesForSteps(self):
+        durationParameters = [(0.2, 0.4, 2.0), (0.6, 1.0, 0.5)]
+        timeList = [0.1, 0.3, 0.5, 0.9, 1.2]
+        stepList = [0.25, 0.5, 1.0]
+
+        stepTimeLists = TimeWarp(durationParameters).mapTimesForSteps(
+            timeList, stepList
+        )
+
+        for stepFactor, newTimeList in zip(stepList, stepTimeLists):
+            np.testing.assert_allclose(
+                TimeWarp(durationParameters, stepFactor).mapTimes(timeList),
+                newTimeList,
+            )
+
+    def test_textgridManipulateDuration(self):
+        fromTGFN = os.path.join(_root, "mary1.TextGrid")
+        toTGFN = os.path.join(_root, "mary2.TextGrid")
+
+        # Morph every phone to the duration of the target phone
+        durationParameters = duration_morph.getMorphParameters(
+            fromTGFN, toTGFN, "phones"
+        )
+        adjustedTG = duration_morph.textgridManipulateDuration(
+            fromTGFN, durationParameters
+        )
+
+        toTG = utils.openTextgrid(toTGFN)
+        for adjustedEntry, toEntry in zip(
+            adjustedTG.getTier("phones").entries, toTG.getTier("phones").entries
+        ):
+            self.assertAlmostEqual(
+                toEntry.end - toEntry.start, adjustedEntry.end - adjustedEntry.start
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Unit tests for promo.morph_utils.utils
+"""
+
+import os
+from os.path import join
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from promo.morph_utils import utils
+
+_root = os.path.join(Path(__file__).parents[2], "examples", "files")
+
+
+class TestOpenTextgrid(unittest.TestCase):
+    """Tests for the parsed textgrid cache"""
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+
+        self.outputPath = tempfile.mkdtemp()
+        self.tgFN = join(self.outputPath, "mary1.TextGrid")
+        shutil.copy(join(_root, "mary1.TextGrid"), self.tgFN)
+
+    def tearDown(self):
+        utils.invalidateTextgridCache()
+        shutil.rmtree(self.outputPath)
+
+    def test_parses_are_reused(self):
+        tg = utils.openTextgrid(self.tgFN)
+
+        self.assertIs(tg, utils.openTextgrid(self.tgFN))
+        self.assertIsNot(tg, utils.openTextgrid(self.tgFN, True))
+
+        utils.invalidateTextgridCache(self.tgFN)
+        self.assertIsNot(tg, utils.openTextgrid(self.tgFN))
+
+    def test_modified_files_are_reparsed(self):
+        tg = utils.openTextgrid(self.tgFN)
+
+        wordTier = tg.getTier("words")
+        newTG = tg.new()
+        newTG.replaceTier("words", wordTier.new(entries=wordTier.entries[:1]))
+        newTG.save(self.tgFN, format="short_textgrid", includeBlankSpaces=True)
+        mtime = os.stat(self.tgFN).st_mtime
+        os.utime(self.tgFN, (mtime + 1, mtime + 1))
+
+        self.assertEqual(
+            1,
+            len(utils.getIntervals(self.tgFN, "words", includeUnlabeledRegions=False)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()